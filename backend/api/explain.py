@@ -1,19 +1,25 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 from pydantic import BaseModel
-from backend.matching import ResumeMatcher
+from backend.resources import AppResources, get_resources
 
 router = APIRouter()
-matcher = ResumeMatcher()
 
 class ExplainRequest(BaseModel):
     job_description: str
     resume_chunks: list
+    bypass_cache: bool = False
 
 @router.post("/explain-match")
-def explain_match(req: ExplainRequest):
-    explanation = matcher.explain_match(
+async def explain_match(req: ExplainRequest, resources: AppResources = Depends(get_resources)):
+    # Only needs the LLM, never the embedder or index; matching (and with it
+    # the LLM client) is imported on the first request, like in AppResources
+    from backend import matching
+
+    explanation = await matching.aexplain_match(
         req.job_description,
-        req.resume_chunks
+        req.resume_chunks,
+        allm=resources.allm,
+        bypass_cache=req.bypass_cache
     )
 
     return {
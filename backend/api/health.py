@@ -1,11 +1,17 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 import os
+from backend.resources import AppResources, get_resources
 
 router = APIRouter()
 
 @router.get("/health")
-def health():
+def health(resources: AppResources = Depends(get_resources)):
+    llm_cache = resources.llm_cache
     return {
-        "status": "ok",
-        "llm_backend": "bytez" if os.getenv("USE_BYTEZ", "true") == "true" else "ollama"
+        "status": "ok" if resources.ready else ("error" if resources.error else "loading"),
+        "ready": resources.ready,
+        "error": resources.error,
+        "llm_backend": "bytez" if os.getenv("USE_BYTEZ", "true") == "true" else "ollama",
+        "llm_cache": llm_cache.stats() if llm_cache is not None else None,
+        "match_batching": resources.matcher.rank_batching_stats() if resources.ready else None
     }
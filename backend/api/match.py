@@ -1,23 +1,96 @@
-from fastapi import APIRouter
+import json
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from backend.matching import ResumeMatcher
+from backend import metrics
+from backend.resources import AppResources, get_resources
 
 router = APIRouter()
-matcher = ResumeMatcher()
 
 
 class MatchRequest(BaseModel):
     job_id: str
     job_description: str
+    # Skip cached LLM explanations and generate fresh ones
+    bypass_cache: bool = False
+    # Add a per-stage latency breakdown ("timings_ms") to the response
+    timings: bool = False
+
+
+class BatchJob(BaseModel):
+    job_id: str
+    job_description: str
+
+
+class BatchMatchRequest(BaseModel):
+    jobs: list[BatchJob]
+    top_k: int = 5
+    # Explanations cost one LLM call per candidate; off for bulk syncs
+    explain: bool = False
+    bypass_cache: bool = False
+    timings: bool = False
 
 
 @router.post("/match")
-def match_resumes(req: MatchRequest):
+async def match_resumes(req: MatchRequest, resources: AppResources = Depends(get_resources)):
     try:
-        return matcher.match(
-            job_id=req.job_id,
-            job_description=req.job_description
-        )
+        with metrics.track() as timings:
+            matcher = await resources.amatcher()
+            result = await matcher.amatch(
+                job_id=req.job_id,
+                job_description=req.job_description,
+                bypass_cache=req.bypass_cache
+            )
+        if req.timings:
+            result["timings_ms"] = metrics.timings_ms(timings)
+        return result
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": str(e)
+        }
+
+
+@router.post("/match/stream")
+async def match_resumes_stream(req: MatchRequest, resources: AppResources = Depends(get_resources)):
+    """
+    Same match as /match, streamed as NDJSON: rankings first, then each
+    explanation (and its tokens) as soon as it is generated.
+    """
+    async def events():
+        try:
+            matcher = await resources.amatcher()
+            async for event in matcher.amatch_stream(
+                job_id=req.job_id,
+                job_description=req.job_description,
+                bypass_cache=req.bypass_cache
+            ):
+                yield json.dumps(event) + "\n"
+        except Exception as e:
+            yield json.dumps({"event": "error", "message": str(e)}) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
+@router.post("/match/batch")
+async def match_resumes_batch(req: BatchMatchRequest, resources: AppResources = Depends(get_resources)):
+    try:
+        with metrics.track() as timings:
+            matcher = await resources.amatcher()
+            results = await matcher.amatch_batch(
+                [job.model_dump() for job in req.jobs],
+                top_k=req.top_k,
+                explain=req.explain,
+                bypass_cache=req.bypass_cache
+            )
+        response = {
+            "total_jobs": len(results),
+            "results": results
+        }
+        if req.timings:
+            response["timings_ms"] = metrics.timings_ms(timings)
+        return response
     except Exception as e:
         return {
             "status": "error",
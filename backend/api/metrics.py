@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import Response
+from backend import metrics
+from backend.resources import AppResources, get_resources
+
+router = APIRouter()
+
+@router.get("/metrics")
+def prometheus_metrics(resources: AppResources = Depends(get_resources)):
+    # Values other objects already keep are copied in at scrape time
+    llm_cache = resources.llm_cache
+    if llm_cache is not None:
+        metrics.CACHE_LOOKUPS.set(llm_cache.hits, cache="llm", result="hit")
+        metrics.CACHE_LOOKUPS.set(llm_cache.misses, cache="llm", result="miss")
+
+    if resources.ready:
+        cache = resources.embedder.cache
+        if cache is not None:
+            metrics.CACHE_LOOKUPS.set(cache.hits, cache="embedding", result="hit")
+            metrics.CACHE_LOOKUPS.set(cache.misses, cache="embedding", result="miss")
+        metrics.INDEX_VECTORS.set(resources.store.index.ntotal)
+        metrics.INDEX_CHUNKS.set(len(resources.store.texts))
+
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
@@ -0,0 +1,88 @@
+# cross-request micro-batching
+import asyncio
+import contextvars
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent submit() calls into batched calls of fn, a blocking
+    function mapping a list of items to a list of results, run in a worker
+    thread. A batch is sent when it reaches max_batch_size or max_wait_ms
+    after its first item arrived; items arriving while a batch is running
+    form the next one, so batches grow with load. A lone caller (nothing
+    else outstanding) is sent at once, so an idle service pays no wait.
+
+    Must be created and used on one event loop.
+    """
+
+    def __init__(self, fn, max_batch_size=32, max_wait_ms=5.0):
+        self.fn = fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.batches = 0
+        self.items = 0
+
+        self._queue = asyncio.Queue()
+        self._task = None
+        self._outstanding = 0
+
+    async def submit(self, item):
+        if self._task is None or self._task.done():
+            # Fresh context: the long-lived task must not carry the first
+            # caller's context variables (e.g. its timing breakdown)
+            self._task = contextvars.Context().run(asyncio.create_task, self._run())
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((item, future))
+        self._outstanding += 1
+        try:
+            return await future
+        finally:
+            self._outstanding -= 1
+
+    async def _next_batch(self):
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0 or self._outstanding <= len(batch):
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        # Callers that gave up while waiting (e.g. client disconnected)
+        return [(item, future) for item, future in batch if not future.done()]
+
+    async def _run(self):
+        while True:
+            batch = await self._next_batch()
+            if not batch:
+                continue
+
+            self.batches += 1
+            self.items += len(batch)
+            try:
+                results = await asyncio.to_thread(self.fn, [item for item, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0
+        }
@@ -0,0 +1,100 @@
+"""
+Micro-benchmark for chunking.SectionParser.
+
+Compares the precompiled, alias-aware parser against the original
+split_by_sections (kept here verbatim as the reference) on the cleaned
+resume texts: time per pass, sections found, char-window chunks produced,
+and how the parser's sections are distributed.
+
+    python backend/benchmark_chunking.py
+"""
+import argparse
+import re
+import time
+from collections import Counter
+
+from benchmark_cleaning import load_texts
+from chunking import RESUME_SECTIONS, SECTION_PARSERS
+from cleaning import clean_texts
+
+
+def reference_split_by_sections(text, section_headers):
+    pattern = "(" + "|".join(section_headers) + ")"
+    splits = re.split(pattern, text, flags=re.IGNORECASE)
+
+    sections = []
+    current_section = "General"
+
+    for part in splits:
+        part_clean = part.strip()
+        if part_clean.lower() in [h.lower() for h in section_headers]:
+            current_section = part_clean
+        elif part_clean:
+            sections.append({
+                "section": current_section,
+                "text": part_clean
+            })
+
+    return sections
+
+
+def char_chunks(sections, chunk_size=500, overlap=100):
+    # Same window arithmetic as chunking.chunk_document
+    step = chunk_size - overlap
+    return sum(-(-len(sec["text"]) // step) for sec in sections)
+
+
+def timed(fn, texts, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    texts = [t for t in clean_texts(load_texts()) if t]
+    section_parser = SECTION_PARSERS["resume"]
+
+    def reference(text):
+        return reference_split_by_sections(text, RESUME_SECTIONS)
+
+    ref_sections = [reference(t) for t in texts]
+    new_sections = [section_parser.split(t) for t in texts]
+
+    print(f"Resumes: {len(texts)}")
+    print(
+        f"reference: {sum(map(len, ref_sections))} sections "
+        f"({sum(len(s) < 50 for ss in ref_sections for s in (x['text'] for x in ss))} under 50 chars), "
+        f"{sum(map(char_chunks, ref_sections))} chunks"
+    )
+    print(
+        f"parser:    {sum(map(len, new_sections))} sections "
+        f"({sum(len(s) < 50 for ss in new_sections for s in (x['text'] for x in ss))} under 50 chars), "
+        f"{sum(map(char_chunks, new_sections))} chunks"
+    )
+    print(f"parser:    {sum(len(ss) == 1 for ss in new_sections)} resumes with a single section")
+
+    # Section distribution: count and average length per section
+    counts = Counter(s["section"] for ss in new_sections for s in ss)
+    chars = Counter()
+    for ss in new_sections:
+        for s in ss:
+            chars[s["section"]] += len(s["text"])
+    for section, count in counts.most_common():
+        print(f"  {section:<18} {count:>6}  avg {chars[section] // count} chars")
+
+    ref_s = timed(reference, texts, args.repeat)
+    new_s = timed(section_parser.split, texts, args.repeat)
+    print(f"\nreference: {ref_s:.3f}s")
+    print(f"parser:    {new_s:.3f}s  speedup x{ref_s / new_s:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Throughput and retrieval-agreement benchmark for the embedding backends.
+
+Encodes a sample of the indexed chunks with each backend (cache disabled)
+and compares against the PyTorch reference: chunks/sec, mean cosine to the
+reference vectors, and overlap@k of each query's top-k chunks within the
+sample. Queries are the job descriptions when available, else chunks.
+
+    python backend/benchmark_embeddings.py --sample 2000
+    python backend/benchmark_embeddings.py --candidate models/all-MiniLM-L6-v2-onnx:onnx_int8
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from chunk_store import ChunkStore
+from embeddings import EMBEDDING_MODEL, EmbeddingModel
+
+# (model, backend) pairs compared against the first one
+DEFAULT_CANDIDATES = [
+    f"{EMBEDDING_MODEL}:torch",
+    f"{EMBEDDING_MODEL}:onnx",
+    f"{EMBEDDING_MODEL}:onnx_int8",
+    "paraphrase-MiniLM-L3-v2:torch",
+]
+
+
+def weights_name(model_name):
+    """
+    Model name without hub prefix or the -onnx suffix export_embeddings.py
+    gives its output directory, so an export compares equal to its source.
+    """
+    name = os.path.basename(model_name.rstrip("/"))
+    return name[:-len("-onnx")] if name.endswith("-onnx") else name
+
+
+def load_texts(index_path, jd_path, sample, queries, seed=0):
+    texts = list(ChunkStore(index_path).texts)
+    rng = np.random.default_rng(seed)
+    if len(texts) > sample:
+        texts = [texts[i] for i in sorted(rng.choice(len(texts), size=sample, replace=False))]
+
+    if os.path.exists(jd_path):
+        query_texts = pd.read_csv(jd_path)["Job Description"].dropna().astype(str).tolist()[:queries]
+    else:
+        query_texts = [texts[i] for i in rng.choice(len(texts), size=min(queries, len(texts)), replace=False)]
+    return texts, query_texts
+
+
+def encode(model, texts, batch_size):
+    start = time.perf_counter()
+    vectors = model.model.encode(
+        texts, batch_size=batch_size, show_progress_bar=False, normalize_embeddings=True
+    )
+    return np.asarray(vectors, dtype="float32"), time.perf_counter() - start
+
+
+def top_k(queries, vectors, k):
+    scores = queries @ vectors.T
+    return np.argpartition(-scores, k - 1, axis=1)[:, :k]
+
+
+def overlap_at_k(found, truth):
+    return float(np.mean([len(np.intersect1d(f, t)) for f, t in zip(found, truth)])) / truth.shape[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--index-path", default="data/faiss_index")
+    parser.add_argument("--jd-path", default="data/cleaned/job_descriptions_cleaned.csv")
+    parser.add_argument("--sample", type=int, default=2000, help="chunks to encode")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument(
+        "--candidate",
+        action="append",
+        help="model:backend to compare (repeatable); the first is the reference"
+    )
+    args = parser.parse_args()
+
+    texts, query_texts = load_texts(args.index_path, args.jd_path, args.sample, args.queries)
+    k = min(args.k, len(texts))
+    print(f"Chunks: {len(texts)}  queries: {len(query_texts)}  k: {k}\n")
+    print(f"{'model:backend':<45} {'chunks/s':>9} {'speedup':>8} {'cosine':>7} {'overlap@k':>10}")
+
+    reference = None
+    for spec in args.candidate or DEFAULT_CANDIDATES:
+        model_name, _, backend = spec.rpartition(":")
+        try:
+            model = EmbeddingModel(model_name, cache=None, backend=backend)
+        except Exception as e:
+            print(f"{spec:<45} skipped: {e}")
+            continue
+
+        encode(model, texts[:args.batch_size], args.batch_size)  # warm-up
+        vectors, seconds = encode(model, texts, args.batch_size)
+        queries, _ = encode(model, query_texts, args.batch_size)
+        rate = len(texts) / seconds
+
+        if reference is None:
+            reference = (model_name, vectors, rate, top_k(queries, vectors, k))
+            print(f"{spec:<45} {rate:>9.1f} {1.0:>7.2f}x {1.0:>7.3f} {1.0:>10.3f}")
+            continue
+
+        ref_name, ref_vectors, ref_rate, ref_top = reference
+        # Cosine to the reference only means something for the same weights
+        # (an export of the reference model); a distilled model has its own
+        # space whichever backend runs it
+        same_weights = weights_name(model_name) == weights_name(ref_name)
+        cosine = float(np.mean(np.sum(vectors * ref_vectors, axis=1))) if same_weights else float("nan")
+        overlap = overlap_at_k(top_k(queries, vectors, k), ref_top)
+        print(f"{spec:<45} {rate:>9.1f} {rate / ref_rate:>7.2f}x {cosine:>7.3f} {overlap:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Recall-vs-latency-vs-memory benchmark for the FAISS index types in vector_store.
+
+Ground truth is an exact IndexFlatIP over the same vectors. Vectors come from
+the flat index written by build_index.py, or are synthetic when --synthetic N
+is given (useful for sizing beyond the current corpus).
+
+    python backend/benchmark_index.py --k 50 --queries 500
+    python backend/benchmark_index.py --synthetic 1000000
+"""
+import argparse
+import time
+
+import faiss
+import numpy as np
+
+from vector_store import make_index, search_params, base_index
+
+# (index_type, query-time parameter name, values to sweep)
+SWEEPS = [
+    ("ivf_flat", "nprobe", [1, 4, 16, 64]),
+    ("ivf_pq", "nprobe", [4, 16, 64]),
+    ("hnsw", "ef_search", [16, 64, 128, 256]),
+    ("sq_fp16", None, [None]),
+    ("sq_int8", None, [None]),
+]
+
+
+def load_vectors(index_path):
+    index = base_index(faiss.read_index(f"{index_path}/index.bin"))
+    if not isinstance(index, faiss.IndexFlat):
+        raise SystemExit(
+            "Benchmark needs the exact baseline: rebuild with FAISS_INDEX_TYPE=flat"
+        )
+    return index.reconstruct_n(0, index.ntotal)
+
+
+def synthetic_vectors(n, dim, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((n, dim), dtype="float32")
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def index_mb(index):
+    # Serialized size, which is also what a memory-mapped load maps
+    return faiss.serialize_index(index).nbytes / 1e6
+
+
+def timed_search(index, queries, k, params=None):
+    latencies = []
+    results = []
+    for q in queries:
+        start = time.perf_counter()
+        _, ids = index.search(q[None, :], k, params=params)
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append(ids[0])
+    return np.array(results), np.array(latencies)
+
+
+def recall_at_k(found, truth):
+    hits = [len(np.intersect1d(f, t)) for f, t in zip(found, truth)]
+    return float(np.mean(hits)) / truth.shape[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--index-path", default="data/faiss_index")
+    parser.add_argument("--synthetic", type=int, default=0, help="use N random vectors")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        vectors = synthetic_vectors(args.synthetic, args.dim)
+    else:
+        vectors = load_vectors(args.index_path)
+    dim = vectors.shape[1]
+
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.choice(len(vectors), size=min(args.queries, len(vectors)), replace=False)]
+    k = min(args.k, len(vectors))
+
+    print(f"Vectors: {len(vectors)}  dim: {dim}  queries: {len(queries)}  k: {k}\n")
+
+    flat = make_index(dim, "flat")
+    flat.add(vectors)
+    truth, flat_lat = timed_search(flat, queries, k)
+
+    header = (f"{'index':<10} {'param':<14} {'recall@k':>9} {'p50 ms':>8} {'p99 ms':>8} "
+              f"{'build s':>8} {'MB':>8}")
+    print(header)
+    print("-" * len(header))
+    print(f"{'flat':<10} {'-':<14} {1.0:>9.3f} "
+          f"{np.percentile(flat_lat, 50):>8.3f} {np.percentile(flat_lat, 99):>8.3f} {'-':>8} "
+          f"{index_mb(flat):>8.1f}")
+
+    for index_type, param, values in SWEEPS:
+        start = time.perf_counter()
+        index = make_index(dim, index_type, n_vectors=len(vectors))
+        if not index.is_trained:
+            index.train(vectors)
+        index.add(vectors)
+        build_s = time.perf_counter() - start
+        size_mb = index_mb(index)
+
+        for value in values:
+            label = "-"
+            params = None
+            if param:
+                params = search_params(index, **{param: value})
+                label = f"{param}={value}"
+            found, lat = timed_search(index, queries, k, params)
+            print(f"{index_type:<10} {label:<14} {recall_at_k(found, truth):>9.3f} "
+                  f"{np.percentile(lat, 50):>8.3f} {np.percentile(lat, 99):>8.3f} {build_s:>8.2f} "
+                  f"{size_mb:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
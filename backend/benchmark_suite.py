@@ -0,0 +1,403 @@
+"""
+End-to-end benchmark and load test on a synthetic corpus.
+
+Generates N resumes and M job descriptions (seeded) in a scratch data
+directory, then measures each stage the way production runs it: ingest
+rows/sec, chunking and embedding throughput, index build time, search
+p50/p99, and /match latency and QPS under concurrency against a uvicorn
+server whose LLM is the stub Ollama server (backend/stub_llm.py). Results
+are written as JSON so runs can be compared between releases.
+
+    python backend/benchmark_suite.py
+    python backend/benchmark_suite.py --resumes 20000 --requests 500 --concurrency 32 --llm-delay-ms 800
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+import numpy as np
+import pandas as pd
+
+from build_index import INDEX_PATH, chunk_documents
+from documents import load_clean_documents
+from embeddings import EMBEDDING_BACKEND, EMBEDDING_MODEL, EmbeddingModel
+from ingest import clean_csv_files
+from stub_llm import StubLLMServer
+from vector_store import VectorStore
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Category -> skill pool for the synthetic corpus
+SKILLS = {
+    "Data Science": ["Python", "PyTorch", "TensorFlow", "scikit-learn", "SQL", "Pandas",
+                     "Spark", "MLflow", "NLP", "Computer Vision", "XGBoost", "Airflow"],
+    "Java Developer": ["Java", "Spring Boot", "Kafka", "Redis", "Microservices", "Hibernate",
+                       "SQL", "Docker", "REST APIs", "JUnit", "Maven", "PostgreSQL"],
+    "DevOps Engineer": ["Kubernetes", "Terraform", "AWS", "Jenkins", "GitHub Actions", "Helm",
+                        "Prometheus", "Grafana", "Docker", "Ansible", "Linux", "CKA"],
+    "Web Designing": ["React", "TypeScript", "Next.js", "Tailwind CSS", "Node.js", "GraphQL",
+                      "Figma", "Accessibility", "Jest", "Webpack", "Storybook", "CSS"],
+    "Testing": ["Selenium", "Cypress", "Appium", "JMeter", "Python", "Java", "CI/CD",
+                "API testing", "Postman", "TestNG", "Playwright", "BDD"],
+    "SAP Developer": ["SAP ABAP", "S/4HANA", "OData", "Adobe Forms", "Fiori", "CDS Views",
+                      "BAPI", "Web Dynpro", "SAP BTP", "IDoc", "SmartForms", "RAP"],
+    "HR": ["Talent acquisition", "Workday", "Employee relations", "Onboarding", "Payroll",
+           "Performance management", "HRIS", "Compensation", "Recruiting", "Training"],
+}
+TITLES = {
+    "Data Science": "Data Scientist", "Java Developer": "Backend Engineer",
+    "DevOps Engineer": "DevOps Engineer", "Web Designing": "Frontend Developer",
+    "Testing": "QA Automation Engineer", "SAP Developer": "SAP ABAP Consultant",
+    "HR": "HR Manager",
+}
+THINGS = ["a reporting platform", "a customer portal", "an internal tool", "a data pipeline",
+          "a payments service", "a recommendation engine", "a migration project", "a monitoring stack"]
+METRICS = ["latency", "costs", "release time", "error rates", "onboarding time", "throughput"]
+DEGREES = ["B.Tech in Computer Science", "M.Sc in Data Science", "B.E. in Electronics",
+           "MBA in Human Resources", "B.Sc in Mathematics", "M.Tech in Software Engineering"]
+
+
+def synthetic_resume(rng, category):
+    skills = rng.sample(SKILLS[category], 6)
+    years = rng.randint(1, 15)
+    experience = " ".join(
+        f"Built {rng.choice(THINGS)} with {rng.choice(skills)} and {rng.choice(skills)}, "
+        f"cutting {rng.choice(METRICS)} by {rng.randint(5, 70)}%."
+        for _ in range(rng.randint(4, 12))
+    )
+    return (
+        f"Summary: {TITLES[category]} with {years} years of experience. "
+        f"Skills: {', '.join(skills)}. "
+        f"Experience: {experience} "
+        f"Projects: Led {rng.choice(THINGS)} for a team of {rng.randint(2, 20)}. "
+        f"Education: {rng.choice(DEGREES)}."
+    )
+
+
+def synthetic_jd(rng, category):
+    skills = rng.sample(SKILLS[category], 5)
+    duties = " ".join(
+        f"Own {rng.choice(THINGS)} and improve {rng.choice(METRICS)}." for _ in range(rng.randint(2, 5))
+    )
+    return (
+        f"Job Description: We are hiring a {TITLES[category]}. "
+        f"Responsibilities: {duties} "
+        f"Requirements: {rng.randint(2, 8)}+ years with {', '.join(skills[:3])}. "
+        f"Preferred Qualifications: {', '.join(skills[3:])}."
+    )
+
+
+def write_corpus(data_dir, n_resumes, n_jds, seed):
+    rng = random.Random(seed)
+    categories = list(SKILLS)
+
+    resumes = []
+    for i in range(n_resumes):
+        category = rng.choice(categories)
+        resumes.append({
+            "Category": category, "Name": f"Candidate {i}", "Resume": synthetic_resume(rng, category)
+        })
+    jds = []
+    for i in range(n_jds):
+        category = rng.choice(categories)
+        jds.append({
+            "Job Title": TITLES[category], "Job Description": synthetic_jd(rng, category)
+        })
+
+    for sub in ("resumes", "job_descriptions", "cleaned"):
+        os.makedirs(os.path.join(data_dir, sub), exist_ok=True)
+    resume_file = os.path.join(data_dir, "resumes", "synthetic_resumes.csv")
+    jd_file = os.path.join(data_dir, "job_descriptions", "synthetic_jds.csv")
+    pd.DataFrame(resumes).to_csv(resume_file, index=False)
+    pd.DataFrame(jds).to_csv(jd_file, index=False)
+    return resume_file, jd_file, [jd["Job Description"] for jd in jds]
+
+
+def summarize_ms(seconds):
+    ms = np.asarray(seconds) * 1000
+    if len(ms) == 0:
+        return None
+    return {
+        "mean": round(float(ms.mean()), 3),
+        "p50": round(float(np.percentile(ms, 50)), 3),
+        "p95": round(float(np.percentile(ms, 95)), 3),
+        "p99": round(float(np.percentile(ms, 99)), 3),
+        "max": round(float(ms.max()), 3),
+    }
+
+
+def bench_ingest(resume_file, jd_file, workers):
+    start = time.perf_counter()
+    jd_in, jd_out = clean_csv_files(
+        [jd_file], "data/cleaned/job_descriptions_cleaned.csv",
+        text_column="Job Description", id_column="jd_id", workers=workers
+    )
+    resume_in, resume_out = clean_csv_files(
+        [resume_file], "data/cleaned/resumes_cleaned.csv",
+        text_column="Resume", id_column="resume_id",
+        keep_columns=["Resume", "Category", "Name"], workers=workers
+    )
+    elapsed = time.perf_counter() - start
+    rows_in = jd_in + resume_in
+    return {
+        "rows_in": rows_in,
+        "rows_out": jd_out + resume_out,
+        "seconds": round(elapsed, 3),
+        "rows_per_sec": round(rows_in / elapsed, 1),
+    }
+
+
+def bench_chunking(documents):
+    start = time.perf_counter()
+    texts, metadata = chunk_documents(documents)
+    elapsed = time.perf_counter() - start
+    return texts, metadata, {
+        "documents": len(documents),
+        "chunks": len(texts),
+        "seconds": round(elapsed, 3),
+        "docs_per_sec": round(len(documents) / elapsed, 1),
+        "chunks_per_sec": round(len(texts) / elapsed, 1),
+    }
+
+
+def bench_embedding(embedder, texts):
+    start = time.perf_counter()
+    embeddings = embedder._encode(texts, show_progress_bar=False)
+    elapsed = time.perf_counter() - start
+    return embeddings, {
+        "model": embedder.model_name,
+        "backend": embedder.backend,
+        "chunks": len(texts),
+        "seconds": round(elapsed, 3),
+        "chunks_per_sec": round(len(texts) / elapsed, 1),
+    }
+
+
+def bench_index(embeddings, texts, metadata):
+    start = time.perf_counter()
+    store = VectorStore(dim=embeddings.shape[1])
+    store.train(embeddings)
+    store.add(embeddings, texts, metadata)
+    store.build_sparse()
+    store.save(INDEX_PATH)
+    elapsed = time.perf_counter() - start
+    return {
+        "index_type": store.index_type,
+        "vectors": int(store.index.ntotal),
+        "build_seconds": round(elapsed, 3),
+    }
+
+
+def bench_search(embedder, queries, top_k):
+    # A fresh load, as the API does it (FAISS_MMAP etc. apply)
+    store = VectorStore(dim=embedder.dim)
+    store.load(INDEX_PATH)
+    query_embeddings = embedder._encode(queries, show_progress_bar=False)
+
+    latencies = []
+    for q in query_embeddings:
+        start = time.perf_counter()
+        store.search_raw_batch(q[None, :], top_k=top_k, filter_type="resume")
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    store.search_raw_batch(query_embeddings, top_k=top_k, filter_type="resume")
+    batch_elapsed = time.perf_counter() - start
+
+    return {
+        "queries": len(queries),
+        "top_k": top_k,
+        "latency_ms": summarize_ms(latencies),
+        "batched_qps": round(len(queries) / batch_elapsed, 1),
+    }
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_api(llm_url, port, timeout=600):
+    """
+    uvicorn serving backend.main:app from the scratch directory (so it picks
+    up data/faiss_index there), with the stub as its LLM and the embedding
+    cache off so every request pays for its encoding.
+    """
+    env = dict(os.environ)
+    env.update({
+        "USE_BYTEZ": "false",
+        "OLLAMA_URL": llm_url,
+        "EMBEDDING_CACHE": "false",
+        "PYTHONPATH": os.pathsep.join(p for p in (ROOT, env.get("PYTHONPATH")) if p),
+    })
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app",
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        env=env
+    )
+
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + timeout
+    try:
+        while time.time() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"API server exited with code {process.returncode}")
+            try:
+                health = httpx.get(f"{base_url}/health", timeout=5).json()
+            except httpx.HTTPError:
+                time.sleep(0.5)
+                continue
+            if health["ready"]:
+                return process, base_url
+            if health["error"]:
+                raise RuntimeError(f"API failed to load: {health['error']}")
+            time.sleep(0.5)
+        raise RuntimeError(f"API not ready after {timeout}s")
+    except BaseException:
+        process.terminate()
+        raise
+
+
+async def load_test(base_url, jds, requests, concurrency, warmup):
+    latencies, stage_timings = [], []
+    errors = 0
+    slots = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=600, limits=limits) as client:
+        async def one(i, record=True):
+            nonlocal errors
+            payload = {
+                "job_id": f"bench-{i}",
+                "job_description": jds[i % len(jds)],
+                # Every request generates, as with a cold LLM cache
+                "bypass_cache": True,
+                "timings": True,
+            }
+            async with slots:
+                start = time.perf_counter()
+                response = await client.post("/match", json=payload)
+                elapsed = time.perf_counter() - start
+            if not record:
+                return
+            body = response.json()
+            if response.status_code != 200 or body.get("status") == "error":
+                errors += 1
+                return
+            latencies.append(elapsed)
+            stage_timings.append(body.get("timings_ms", {}))
+
+        for i in range(warmup):
+            await one(i, record=False)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        wall = time.perf_counter() - start
+
+    stages = sorted({name for t in stage_timings for name in t})
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "seconds": round(wall, 3),
+        "qps": round(len(latencies) / wall, 2),
+        "latency_ms": summarize_ms(latencies),
+        "mean_stage_ms": {
+            name: round(float(np.mean([t.get(name, 0.0) for t in stage_timings])), 3)
+            for name in stages
+        },
+    }
+
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "embedding_model": EMBEDDING_MODEL,
+        "embedding_backend": EMBEDDING_BACKEND,
+        "faiss_index_type": os.getenv("FAISS_INDEX_TYPE", "flat"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--resumes", type=int, default=2000)
+    parser.add_argument("--jds", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", default=os.path.join(ROOT, "data", "benchmark"),
+                        help="scratch directory; its data/ is overwritten")
+    parser.add_argument("--ingest-workers", type=int, default=1)
+    parser.add_argument("--top-k", type=int, default=25, help="chunk hits per search")
+    parser.add_argument("--requests", type=int, default=200, help="/match requests; 0 skips the load test")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--llm-delay-ms", type=float, default=200.0)
+    parser.add_argument("--output", default="benchmark_results.json")
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output)
+    os.makedirs(args.workdir, exist_ok=True)
+    # Pipeline modules use data/... paths relative to the working directory
+    os.chdir(args.workdir)
+
+    results = {"config": vars(args), "environment": environment()}
+
+    print(f"Generating {args.resumes} resumes and {args.jds} job descriptions...")
+    resume_file, jd_file, jds = write_corpus("data", args.resumes, args.jds, args.seed)
+
+    print("Ingest...")
+    results["ingest"] = bench_ingest(resume_file, jd_file, args.ingest_workers)
+
+    print("Chunking...")
+    texts, metadata, results["chunking"] = bench_chunking(load_clean_documents())
+
+    print("Embedding...")
+    embedder = EmbeddingModel(cache=None)
+    embeddings, results["embedding"] = bench_embedding(embedder, texts)
+
+    print("Index build...")
+    results["index"] = bench_index(embeddings, texts, metadata)
+
+    print("Search...")
+    results["search"] = bench_search(embedder, jds, args.top_k)
+
+    if args.requests > 0:
+        llm = StubLLMServer(("127.0.0.1", 0), delay_ms=args.llm_delay_ms).start()
+        print(f"Load test against /match (stub LLM {args.llm_delay_ms:.0f} ms)...")
+        process, base_url = start_api(llm.url, _free_port())
+        try:
+            results["match"] = asyncio.run(
+                load_test(base_url, jds, args.requests, args.concurrency, args.warmup)
+            )
+            results["match"]["llm_delay_ms"] = args.llm_delay_ms
+            results["match"]["llm_requests"] = llm.requests
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+            llm.shutdown()
+
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(json.dumps({k: v for k, v in results.items() if k not in ("config", "environment")}, indent=2))
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
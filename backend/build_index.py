@@ -1,28 +1,132 @@
+import argparse
+import os
+
 from documents import load_clean_documents
-from chunking import chunk_document
-from embeddings import EmbeddingModel
+from chunking import TokenChunker, chunk_document
+from embeddings import EMBEDDING_MODEL, EmbeddingModel
+from parallel_embed import EMBED_WORKERS, clear_shards, embed_in_shards
 from vector_store import VectorStore
 
-print("Loading documents...")
-documents = load_clean_documents()
+INDEX_PATH = "data/faiss_index"
+
+# "token" packs sentences up to the encoder's token limit; "char" is the old
+# fixed 500-character window. Incremental builds must use the same chunker
+# the index was built with.
+CHUNKER = os.getenv("CHUNKER", "token")
+
+
+def chunk_documents(documents):
+    if CHUNKER == "char":
+        all_chunks = []
+        for doc in documents:
+            all_chunks.extend(chunk_document(doc))
+    else:
+        all_chunks = TokenChunker.from_model(EMBEDDING_MODEL).chunk_documents(documents)
+
+    texts = [chunk["content"] for chunk in all_chunks]
+    metadata = [chunk["metadata"] for chunk in all_chunks]
+    return texts, metadata
+
+
+def embed_chunks(texts, workers):
+    # Cache misses go through length-sorted, resumable shards
+    embedder = EmbeddingModel()
+    return embedder.embed_texts(
+        texts, encode=lambda missing: embed_in_shards(missing, embedder, workers)
+    )
+
+
+def build_full(workers=EMBED_WORKERS):
+    print("Loading documents...")
+    documents = load_clean_documents()
+
+    print("Chunking documents...")
+    texts, metadata = chunk_documents(documents)
+
+    print(f"Total chunks: {len(texts)}")
+
+    print("Generating embeddings...")
+    embeddings = embed_chunks(texts, workers)
+
+    print("Building FAISS index...")
+    store = VectorStore(dim=len(embeddings[0]))
+
+    # FAISS_INDEX_TYPE selects flat / ivf_flat / ivf_pq / hnsw
+    print(f"Training {store.index_type} index...")
+    store.train(embeddings)
+    store.add(embeddings, texts, metadata)
+
+    print("Building BM25 index...")
+    store.build_sparse()
+
+    store.save(INDEX_PATH)
+    clear_shards()
+    print(f"Vectors: {store.index.ntotal}")
+    print("FAISS index saved successfully.")
+
+
+def build_incremental(workers=EMBED_WORKERS):
+    print("Loading existing index...")
+    store = VectorStore(dim=384)
+    store.load(INDEX_PATH)
+
+    print("Loading documents...")
+    documents = load_clean_documents()
+
+    # Doc ids are content hashes, so a changed document shows up as a new id
+    # plus a removed one and unchanged documents are skipped entirely.
+    current_ids = {doc["metadata"]["doc_id"] for doc in documents}
+    indexed_ids = store.document_ids()
+
+    new_docs = [doc for doc in documents if doc["metadata"]["doc_id"] not in indexed_ids]
+    removed_ids = indexed_ids - current_ids
+
+    print(
+        f"New/changed: {len(new_docs)}  Removed: {len(removed_ids)}  "
+        f"Unchanged: {len(current_ids) - len(new_docs)}"
+    )
+
+    if removed_ids:
+        removed = store.delete_documents(removed_ids)
+        print(f"Deleted {removed} chunks")
+
+    if new_docs:
+        texts, metadata = chunk_documents(new_docs)
+        print(f"Embedding {len(texts)} new chunks...")
+        embeddings = embed_chunks(texts, workers)
+        store.add_documents(embeddings, texts, metadata)
 
-print("Chunking documents...")
-all_chunks = []
-for doc in documents:
-    all_chunks.extend(chunk_document(doc))
+    if not new_docs and not removed_ids and store.sparse is not None:
+        print("Index already up to date.")
+        return
 
-texts = [chunk["content"] for chunk in all_chunks]
-metadata = [chunk["metadata"] for chunk in all_chunks]
+    # Row ids and idf both change with the corpus, so BM25 is rebuilt whole
+    print("Building BM25 index...")
+    store.build_sparse()
 
-print(f"Total chunks: {len(texts)}")
+    store.save(INDEX_PATH)
+    clear_shards()
+    print("FAISS index updated successfully.")
 
-print("Generating embeddings...")
-embedder = EmbeddingModel()
-embeddings = embedder.embed_texts(texts)
 
-print("Building FAISS index...")
-store = VectorStore(dim=len(embeddings[0]))
-store.add(embeddings, texts, metadata)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the resume/JD FAISS index")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only embed new or changed documents and drop removed ones "
+             "(IVF centroids are not retrained; rebuild fully now and then)"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=EMBED_WORKERS,
+        help="embedding processes; shards in data/embedding_shards let a "
+             "crashed build resume where it stopped"
+    )
+    args = parser.parse_args()
 
-store.save()
-print("FAISS index saved successfully.")
+    if args.incremental:
+        build_incremental(args.workers)
+    else:
+        build_full(args.workers)
@@ -0,0 +1,152 @@
+# columnar, memory-mapped chunk texts + metadata
+import json
+import math
+import mmap
+import os
+import shutil
+import tempfile
+from collections.abc import Sequence
+
+import numpy as np
+
+# On-disk layout (all under the index directory):
+#   texts.bin         UTF-8 chunk texts, concatenated
+#   text_offsets.npy  int64[n + 1] byte offsets into texts.bin
+#   meta_<field>.npy  int32[n] codes into the field's vocabulary, -1 = missing
+#   meta_vocab.json   {field: [distinct values]}
+#
+# The .npy columns are opened with mmap_mode="r" and texts.bin with mmap, so
+# every worker process shares the same page-cache pages and only the rows a
+# search returns are ever decoded.
+
+TEXTS_FILE = "texts.bin"
+OFFSETS_FILE = "text_offsets.npy"
+VOCAB_FILE = "meta_vocab.json"
+
+
+def _is_missing(value):
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def write_chunk_store(path, texts, metadata):
+    """
+    Files are written to a temporary directory and moved into place, so a
+    ChunkStore still mapping the old files (e.g. the one a VectorStore was
+    loaded from) keeps reading them instead of a truncated file.
+    """
+    os.makedirs(path, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=".chunk_store_", dir=path)
+    try:
+        _write_files(tmp_dir, texts, metadata)
+        for filename in os.listdir(tmp_dir):
+            os.replace(os.path.join(tmp_dir, filename), os.path.join(path, filename))
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _write_files(path, texts, metadata):
+    offsets = np.zeros(len(texts) + 1, dtype="int64")
+    with open(os.path.join(path, TEXTS_FILE), "wb") as f:
+        for i, text in enumerate(texts):
+            data = text.encode("utf-8")
+            f.write(data)
+            offsets[i + 1] = offsets[i] + len(data)
+    np.save(os.path.join(path, OFFSETS_FILE), offsets)
+
+    fields = []
+    for meta in metadata:
+        for field in meta:
+            if field not in fields:
+                fields.append(field)
+
+    vocab = {}
+    for field in fields:
+        lookup = {}
+        codes = np.full(len(metadata), -1, dtype="int32")
+        for i, meta in enumerate(metadata):
+            value = meta.get(field)
+            if _is_missing(value):
+                continue
+            codes[i] = lookup.setdefault(value, len(lookup))
+        vocab[field] = list(lookup)
+        np.save(os.path.join(path, f"meta_{field}.npy"), codes)
+
+    with open(os.path.join(path, VOCAB_FILE), "w") as f:
+        json.dump(vocab, f)
+
+
+class ChunkStore:
+    """
+    Read-only view over a chunk store written by write_chunk_store().
+    """
+
+    def __init__(self, path):
+        self.offsets = np.load(os.path.join(path, OFFSETS_FILE), mmap_mode="r")
+
+        with open(os.path.join(path, VOCAB_FILE)) as f:
+            self.vocab = json.load(f)
+        self.columns = {
+            field: np.load(os.path.join(path, f"meta_{field}.npy"), mmap_mode="r")
+            for field in self.vocab
+        }
+
+        self._blob = b""
+        with open(os.path.join(path, TEXTS_FILE), "rb") as f:
+            # mmap cannot map an empty file
+            if os.fstat(f.fileno()).st_size:
+                self._blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self.texts = TextColumn(self)
+        self.metadata = MetadataColumn(self)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def _row(self, i):
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("chunk index out of range")
+        return i
+
+    def text(self, i):
+        i = self._row(i)
+        return self._blob[self.offsets[i]:self.offsets[i + 1]].decode("utf-8")
+
+    def meta(self, i):
+        i = self._row(i)
+        meta = {}
+        for field, codes in self.columns.items():
+            code = codes[i]
+            meta[field] = self.vocab[field][code] if code >= 0 else None
+        return meta
+
+    def codes(self, field):
+        return self.columns[field]
+
+
+class TextColumn(Sequence):
+    def __init__(self, store):
+        self._store = store
+
+    def __len__(self):
+        return len(self._store)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._store.text(j) for j in range(*i.indices(len(self)))]
+        return self._store.text(i)
+
+
+class MetadataColumn(Sequence):
+    def __init__(self, store):
+        self._store = store
+
+    def __len__(self):
+        return len(self._store)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._store.meta(j) for j in range(*i.indices(len(self)))]
+        return self._store.meta(i)
@@ -1,5 +1,8 @@
 # Chunking logic
+import json
+import os
 import re
+from functools import lru_cache
 
 RESUME_SECTIONS = [
     "Skills",
@@ -24,35 +27,180 @@ JD_SECTIONS = [
 ]
 
 
+# Multi-word and prefixed spellings of the headers above, mapped to the
+# section they open. "Company Details" is how every resume in the Kaggle
+# dataset starts its work history.
+RESUME_HEADER_ALIASES = {
+    "Skill": "Skills",
+    "Skill Details": "Skills",
+    "Technical Skills": "Skills",
+    "Technical Skill": "Skills",
+    "Key Skills": "Skills",
+    "Core Skills": "Skills",
+    "Computer Skills": "Skills",
+    "IT Skills": "Skills",
+    "Software Skills": "Skills",
+    "Soft Skills": "Skills",
+    "Primary Skills": "Skills",
+    "Other Skills": "Skills",
+    "Professional Skills": "Skills",
+    "Personal Skills": "Skills",
+    "Technological Skills": "Skills",
+    "Core Competencies": "Skills",
+    "Key Competencies": "Skills",
+    "Areas of Expertise": "Skills",
+    "Area of Expertise": "Skills",
+    "Technical Expertise": "Skills",
+    "Computer Knowledge": "Skills",
+    "Education Details": "Education",
+    "Educational Qualification": "Education",
+    "Educational Qualifications": "Education",
+    "Academic Qualification": "Education",
+    "Academic Qualifications": "Education",
+    "Academic Details": "Education",
+    "Company Details": "Experience",
+    "Work Experience": "Experience",
+    "Professional Experience": "Experience",
+    "Employment History": "Experience",
+    "Work History": "Experience",
+    "Project Details": "Projects",
+    "Academic Projects": "Projects",
+    "Job Responsibilities": "Responsibilities",
+    "Key Responsibilities": "Responsibilities",
+    "Roles and Responsibilities": "Responsibilities",
+    "Roles & Responsibilities": "Responsibilities",
+    "Professional Summary": "Summary",
+    "Technical Summary": "Summary",
+    "Career Summary": "Summary",
+    "Profile Summary": "Summary",
+}
+
+JD_HEADER_ALIASES = {
+    "Key Responsibilities": "Responsibilities",
+    "Job Responsibilities": "Responsibilities",
+    "Job Requirements": "Requirements",
+    "Minimum Qualifications": "Basic Qualifications",
+}
+
+# Bullet glyphs, including "*", "~", "o" and "q" bullets, and the
+# mis-decoded "â\x80¢" bullets of the Kaggle resume export, which cleaning
+# leaves as "a" + combining circumflex
+_BULLETS = "•▪➢✅✖*~"
+_BULLET = rf"[{_BULLETS}]|a\u0302|[-oq](?=\s)"
+
+# Characters that end a line in cleaned text, whose newlines are collapsed:
+# a header right after one of these is at the start of a line
+_LINE_END = ".!?:;|" + _BULLETS
+
+# What must follow a one-word header for it to be one: a delimiter, the end
+# of the line, or a capitalised word or bullet ("Skills Python",
+# "Skills * ...", not "experience in").
+_SPACE = r"[^\S\n]"
+_HEADER_END = rf"(?:{_SPACE}*[:\-–]|(?={_SPACE}*(?:\n|$)|{_SPACE}+(?:[A-Z0-9]|{_BULLET})))"
+
+
+class SectionParser:
+    """
+    Splits text into sections at headers. The header regex is compiled
+    once; a matched header (or alias) is mapped back to its canonical
+    section, so "SKILLS:", "Key Skills" and "Skill Details" land in the
+    same section.
+
+    A header counts at the start of a line in any case, elsewhere only when
+    capitalised, since cleaned text has few line breaks left. Multi-word
+    headers are specific enough to need nothing after them; one-word
+    headers must be followed by _HEADER_END.
+    """
+
+    def __init__(self, headers, aliases=None):
+        self.headers = list(headers)
+        self._lookup = {h.lower(): h for h in self.headers}
+        for alias, header in (aliases or {}).items():
+            self._lookup[alias.lower()] = header
+
+        # Longest first, so "Basic Qualifications" wins over "Qualifications"
+        spellings = sorted(self._lookup, key=len, reverse=True)
+        phrases = "|".join(re.escape(h).replace(r"\ ", r"\s+") for h in spellings if " " in h)
+        words = "|".join(re.escape(h) for h in spellings if " " not in h)
+        alternatives = [rf"(?P<word>(?i:{words})){_HEADER_END}"]
+        if phrases:
+            alternatives.insert(0, rf"(?P<phrase>(?i:{phrases}))\b(?:{_SPACE}*[:\-–])?")
+        # A word boundary, or a header glued to the previous word by the
+        # cleaning ("monthsCompany Details")
+        self._pattern = re.compile(r"(?:\b|(?<=[a-z])(?=[A-Z]))(?:" + "|".join(alternatives) + ")")
+
+    def _is_header(self, text, match, header):
+        if header[0].isupper():
+            return True
+        before = text[:match.start()].rstrip()
+        return not before or before[-1] in _LINE_END or "\n" in text[len(before):match.start()]
+
+    def split(self, text):
+        sections = []
+        current_section = "General"
+        start = 0
+
+        for match in self._pattern.finditer(text):
+            header = match.group("word") or match.group("phrase")
+            if not self._is_header(text, match, header):
+                continue
+            part = text[start:match.start()].strip()
+            if part:
+                sections.append({"section": current_section, "text": part})
+            current_section = self._lookup[" ".join(header.lower().split())]
+            start = match.end()
+
+        part = text[start:].strip()
+        if part:
+            sections.append({"section": current_section, "text": part})
+
+        return sections
+
+
+# Header vocabulary per document type; anything else uses the JD parser
+SECTION_PARSERS = {
+    "resume": SectionParser(RESUME_SECTIONS, RESUME_HEADER_ALIASES),
+    "job_description": SectionParser(JD_SECTIONS, JD_HEADER_ALIASES),
+}
+
+
+def get_section_parser(doc_type):
+    return SECTION_PARSERS.get(doc_type, SECTION_PARSERS["job_description"])
+
+
+@lru_cache(maxsize=32)
+def _parser_for_headers(section_headers):
+    return SectionParser(section_headers)
+
+
 def split_by_sections(text, section_headers):
-    pattern = "(" + "|".join(section_headers) + ")"
-    splits = re.split(pattern, text, flags=re.IGNORECASE)
+    return _parser_for_headers(tuple(section_headers)).split(text)
 
-    sections = []
-    current_section = "General"
 
-    for part in splits:
-        part_clean = part.strip()
-        if part_clean.lower() in [h.lower() for h in section_headers]:
-            current_section = part_clean
-        elif part_clean:
-            sections.append({
-                "section": current_section,
-                "text": part_clean
-            })
+def _make_chunk(doc, section, chunk_idx, chunk_text):
+    return {
+        "chunk_id": f"{doc['metadata']['doc_id']}_{section}_{chunk_idx}",
+        "content": chunk_text,
+        "metadata": {
+            # CORE IDs
+            "doc_id": doc["metadata"]["doc_id"],
+            "type": doc["metadata"]["type"],
 
-    return sections
+            # IMPORTANT FIELDS (NOW PRESERVED)
+            "name": doc["metadata"].get("name"),
+            "category": doc["metadata"].get("category"),
+            "title": doc["metadata"].get("title"),
+
+            # SECTION INFO
+            "section": section
+        }
+    }
 
 
 def chunk_document(doc, chunk_size=500, overlap=100):
     chunks = []
 
-    doc_type = doc["metadata"]["type"]
-
-    if doc_type == "resume":
-        sections = split_by_sections(doc["text"], RESUME_SECTIONS)
-    else:
-        sections = split_by_sections(doc["text"], JD_SECTIONS)
+    sections = get_section_parser(doc["metadata"]["type"]).split(doc["text"])
 
     for sec in sections:
         text = sec["text"]
@@ -63,25 +211,182 @@ def chunk_document(doc, chunk_size=500, overlap=100):
             end = start + chunk_size
             chunk_text = text[start:end]
 
-            chunks.append({
-                "chunk_id": f"{doc['metadata']['doc_id']}_{sec['section']}_{chunk_idx}",
-                "content": chunk_text,
-                "metadata": {
-                    # CORE IDs
-                    "doc_id": doc["metadata"]["doc_id"],
-                    "type": doc_type,
-
-                    # IMPORTANT FIELDS (NOW PRESERVED)
-                    "name": doc["metadata"].get("name"),
-                    "category": doc["metadata"].get("category"),
-                    "title": doc["metadata"].get("title"),
-
-                    # SECTION INFO
-                    "section": sec["section"]
-                }
-            })
+            chunks.append(_make_chunk(doc, sec["section"], chunk_idx, chunk_text))
 
             start += chunk_size - overlap
             chunk_idx += 1
 
     return chunks
+
+
+# Sentence ends, plus the bullet glyphs resumes use instead of sentences
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+|\s+(?=[•▪➢✅✖])')
+
+
+def split_sentences(text):
+    return [s for s in SENTENCE_BOUNDARY.split(text) if s.strip()]
+
+
+# Upper bound on a model window read from the tokenizer, whose
+# model_max_length is sometimes a huge "no limit" sentinel
+MAX_MODEL_WINDOW = 512
+
+# Overlap as a fraction of max_tokens when from_model picks the window
+OVERLAP_RATIO = 0.125
+
+
+def model_window(model_name, tokenizer):
+    """
+    Tokens the encoder reads per text, special tokens included: the
+    sentence-transformers max_seq_length when the model has one, otherwise
+    the tokenizer's model_max_length, capped at MAX_MODEL_WINDOW.
+    """
+    try:
+        if os.path.isdir(model_name):
+            path = os.path.join(model_name, "sentence_bert_config.json")
+        else:
+            from huggingface_hub import hf_hub_download
+            path = hf_hub_download(model_name, "sentence_bert_config.json")
+        with open(path) as f:
+            return json.load(f)["max_seq_length"]
+    except Exception:
+        # Not a sentence-transformers model, or the hub is unreachable
+        return min(tokenizer.model_max_length, MAX_MODEL_WINDOW)
+
+
+class TokenChunker:
+    """
+    Packs whole sentences into chunks measured in model tokens, so chunks
+    fill the encoder's window without being truncated at encode time.
+
+    max_tokens excludes the [CLS]/[SEP] pair the encoder adds (MiniLM reads
+    256 tokens in total). overlap_tokens worth of trailing sentences are
+    repeated at the start of the next chunk. Sentences longer than a whole
+    chunk are split at word boundaries.
+    """
+
+    def __init__(self, tokenizer, max_tokens=254, overlap_tokens=32):
+        self.tokenizer = tokenizer
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+
+    @classmethod
+    def from_model(cls, model_name="all-MiniLM-L6-v2", max_tokens=None, overlap_tokens=None):
+        """
+        Chunker for model_name's tokenizer. max_tokens defaults to the
+        model's window minus [CLS]/[SEP], overlap_tokens to OVERLAP_RATIO
+        of max_tokens.
+        """
+        from transformers import AutoTokenizer
+
+        # Same naming shortcut as SentenceTransformer
+        if "/" not in model_name and not os.path.isdir(model_name):
+            model_name = f"sentence-transformers/{model_name}"
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+
+        if max_tokens is None:
+            max_tokens = model_window(model_name, tokenizer) - 2
+        if overlap_tokens is None:
+            overlap_tokens = round(max_tokens * OVERLAP_RATIO)
+        return cls(tokenizer, max_tokens=max_tokens, overlap_tokens=overlap_tokens)
+
+    def _tokenize(self, texts, offsets=False):
+        return self.tokenizer(
+            texts,
+            add_special_tokens=False,
+            return_offsets_mapping=offsets,
+            return_attention_mask=False,
+            return_token_type_ids=False
+        )
+
+    def _split_long(self, sentence, offsets):
+        # Cut an oversized sentence into windows of max_tokens, moving each
+        # cut back to the start of a word so no word is split in half
+        pieces = []
+        start = 0
+        while start < len(offsets):
+            end = min(start + self.max_tokens, len(offsets))
+            if end < len(offsets):
+                cut = end
+                while cut > start + 1 and not sentence[offsets[cut][0] - 1:offsets[cut][0]].isspace():
+                    cut -= 1
+                if cut > start + 1:
+                    end = cut
+            pieces.append((sentence[offsets[start][0]:offsets[end - 1][1]], end - start))
+            start = end
+        return pieces
+
+    def _pack(self, sentences):
+        """
+        sentences: [(text, n_tokens)] -> list of chunk texts.
+        """
+        chunks = []
+        current = []
+        size = 0
+
+        for sentence, n_tokens in sentences:
+            if current and size + n_tokens > self.max_tokens:
+                chunks.append(" ".join(text for text, _ in current))
+
+                # Carry trailing sentences over as overlap
+                carry = []
+                carried = 0
+                for text, n in reversed(current):
+                    if carried + n > self.overlap_tokens or carried + n + n_tokens > self.max_tokens:
+                        break
+                    carry.insert(0, (text, n))
+                    carried += n
+                current = carry
+                size = carried
+
+            current.append((sentence, n_tokens))
+            size += n_tokens
+
+        if current:
+            chunks.append(" ".join(text for text, _ in current))
+        return chunks
+
+    def chunk_documents(self, docs):
+        """
+        Chunk a list of documents with one batched tokenizer call over all
+        of their sentences; same chunk format as chunk_document().
+        """
+        sections = []
+        for doc in docs:
+            for sec in get_section_parser(doc["metadata"]["type"]).split(doc["text"]):
+                sections.append((doc, sec["section"], split_sentences(sec["text"])))
+
+        all_sentences = [s for _, _, sentences in sections for s in sentences]
+        lengths = [len(ids) for ids in self._tokenize(all_sentences)["input_ids"]] if all_sentences else []
+
+        # Offsets are only needed for the rare over-long sentences
+        long_ids = [i for i, n in enumerate(lengths) if n > self.max_tokens]
+        long_pieces = {}
+        if long_ids:
+            encoded = self._tokenize([all_sentences[i] for i in long_ids], offsets=True)
+            for i, offsets in zip(long_ids, encoded["offset_mapping"]):
+                long_pieces[i] = self._split_long(all_sentences[i], offsets)
+
+        chunks = []
+        position = 0
+        chunk_counts = {}
+        for doc, section, sentences in sections:
+            measured = []
+            for sentence in sentences:
+                if position in long_pieces:
+                    measured.extend(long_pieces[position])
+                else:
+                    measured.append((sentence, lengths[position]))
+                position += 1
+
+            for chunk_text in self._pack(measured):
+                doc_id = doc["metadata"]["doc_id"]
+                chunk_idx = chunk_counts.get((doc_id, section), 0)
+                chunk_counts[(doc_id, section)] = chunk_idx + 1
+
+                chunks.append(_make_chunk(doc, section, chunk_idx, chunk_text))
+
+        return chunks
+
+    def chunk_document(self, doc):
+        return self.chunk_documents([doc])
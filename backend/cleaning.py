@@ -1,40 +1,85 @@
+import hashlib
 import re
 import unicodedata
 
+
+def content_hash(text: str) -> str:
+    """
+    Stable document id derived from cleaned text, so re-running ingestion
+    gives unchanged documents the same id and changed ones a new id.
+    """
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+# Specific fixes for common encoding artifacts in these datasets
+REPLACEMENTS = {
+    "â€¢": "•",
+    "â–ª": "▪",
+    "âž”": "➢",
+    "Ã¼": "ü",
+    "âœ…": "✅",
+    "âœ–": "✖",
+    "ï‚·": "•",
+    "â€“": "-",
+    "â€™": "'",
+    "â€œ": '"',
+    "â€": '"',
+}
+
+# One alternation for all fixes; longer sequences are listed before their
+# prefixes ("â€" last), matching the old sequential str.replace order.
+_MOJIBAKE = re.compile("|".join(map(re.escape, REPLACEMENTS)))
+_MOJIBAKE_LEADS = tuple({old[0] for old in REPLACEMENTS})
+
+# URLs, emails and phone numbers in a single pass. The old code removed them
+# one after another, so the email and phone branches carry guards that
+# reproduce what the earlier removals would have done:
+#   - an email's local part never runs into "http..." (that was a URL first)
+#   - a phone number may end right before a URL, or span a removed URL
+#     between "+CC" and the number
+#   - "+CC number" is not a phone if the number is part of an email
+_NOT_URL = r'(?:(?!http\S)\S)'
+_REMOVALS = re.compile(
+    r'http\S+\s*'
+    r'|(?<!\S)' + _NOT_URL + r'*@\S*\s?'
+    r'|\b\d{10}(?:\b|(?=http\S))'
+    r'|\+\d{1,3}(?:\s?|http\S+\s+)\d{10}(?!' + _NOT_URL + r'*@)'
+)
+
+# Every removal needs one of these, so most resumes skip the regex entirely
+_TEN_DIGITS = re.compile(r'\d{10}')
+
+
 def clean_text(text: str) -> str:
     if not isinstance(text, str):
         return ""
-    
+
     # Normalize unicode characters
-    text = unicodedata.normalize("NFKD", text)
-
-    # Specific fixes for common encoding artifacts in these datasets
-    replacements = {
-        "â€¢": "•",
-        "â–ª": "▪",
-        "âž”": "➢",
-        "Ã¼": "ü",
-        "âœ…": "✅",
-        "âœ–": "✖",
-        "ï‚·": "•",
-        "â€“": "-",
-        "â€™": "'",
-        "â€œ": '"',
-        "â€": '"',
-    }
-    for old, new in replacements.items():
-        text = text.replace(old, new)
-
-    # Remove URLs
-    text = re.sub(r'http\S+\s*', ' ', text)
-    
-    # Remove Emails
-    text = re.sub(r'\S*@\S*\s?', ' ', text)
-    
-    # Remove Phone numbers (simple pattern)
-    text = re.sub(r'\b\d{10}\b|\+\d{1,3}\s?\d{10}', ' ', text)
-
-    # Remove extra whitespace and newlines
-    text = re.sub(r'\s+', ' ', text)
-
-    return text.strip()
\ No newline at end of file
+    if not unicodedata.is_normalized("NFKD", text):
+        text = unicodedata.normalize("NFKD", text)
+
+    # Fix encoding artifacts
+    if any(lead in text for lead in _MOJIBAKE_LEADS):
+        text = _MOJIBAKE.sub(lambda m: REPLACEMENTS[m.group()], text)
+
+    # Remove URLs, emails and phone numbers
+    if "http" in text or "@" in text or _TEN_DIGITS.search(text):
+        text = _REMOVALS.sub(" ", text)
+
+    # Remove extra whitespace and newlines (str.split uses the same
+    # whitespace definition as \s)
+    return " ".join(text.split())
+
+
+def clean_texts(texts) -> list:
+    """
+    Batch form of clean_text for lists of raw texts.
+    """
+    return [clean_text(text) for text in texts]
+
+
+def clean_series(series):
+    """
+    Batch form of clean_text for a pandas Series; keeps the index.
+    """
+    return series.map(clean_text)
@@ -0,0 +1,137 @@
+# on-disk embedding cache
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+_WHITESPACE = re.compile(r"\s+")
+
+# SQLite limits the number of bound parameters per statement
+_BATCH = 500
+
+# LRU bookkeeping is coarse: a hit only refreshes last_used if it is older
+# than this, and refreshes are written in batches of _TOUCH_FLUSH (or with
+# the next put), so lookups stay read-only.
+TOUCH_INTERVAL = 3600
+_TOUCH_FLUSH = 1000
+
+# Eviction trims the cache to this share of max_entries, so it runs once per
+# many inserts instead of on every one.
+_EVICT_TO = 0.9
+
+# Several API workers share one cache file; wait this long (seconds) for
+# another writer's lock instead of failing.
+BUSY_TIMEOUT = 30
+
+
+def cache_key(model_name, text):
+    """
+    Key on model name plus whitespace-normalized text; the tokenizer ignores
+    whitespace runs, so texts differing only in spacing embed identically.
+    """
+    normalized = _WHITESPACE.sub(" ", text).strip()
+    return hashlib.sha1(f"{model_name}\0{normalized}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    SQLite-backed map from cache_key() to a float32 vector, bounded to
+    max_entries by evicting the least recently used rows.
+    """
+
+    def __init__(self, path, max_entries=1_000_000):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT * 1000}")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY,"
+            " vector BLOB NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)"
+        )
+        self._conn.commit()
+
+        # Upper bound on the row count (replaced keys are counted again);
+        # recounted exactly only when it passes max_entries
+        self._count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        self._touched = set()
+
+    def get_many(self, keys):
+        """
+        Return {key: vector} for the keys present in the cache.
+        """
+        found = {}
+        stale = time.time() - TOUCH_INTERVAL
+        with self._lock:
+            for i in range(0, len(keys), _BATCH):
+                batch = keys[i:i + _BATCH]
+                marks = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector, last_used FROM embeddings WHERE key IN ({marks})", batch
+                ).fetchall()
+                for key, blob, last_used in rows:
+                    found[key] = np.frombuffer(blob, dtype="float32")
+                    if last_used < stale:
+                        self._touched.add(key)
+            if len(self._touched) >= _TOUCH_FLUSH:
+                self._flush_touched()
+                self._conn.commit()
+
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def _flush_touched(self):
+        self._conn.executemany(
+            "UPDATE embeddings SET last_used = ? WHERE key = ?",
+            [(time.time(), key) for key in self._touched]
+        )
+        self._touched.clear()
+
+    def put_many(self, items):
+        """
+        Store (key, vector) pairs and evict the oldest rows once the cache
+        grows past max_entries.
+        """
+        now = time.time()
+        rows = [(key, np.asarray(vec, dtype="float32").tobytes(), now) for key, vec in items]
+        with self._lock:
+            self._flush_touched()
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)", rows
+            )
+            self._count += len(rows)
+            if self._count > self.max_entries:
+                self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        (self._count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        if self._count <= self.max_entries:
+            return
+        target = int(self.max_entries * _EVICT_TO)
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE key IN ("
+            " SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+            (self._count - target,)
+        )
+        self._count = target
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
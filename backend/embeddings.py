@@ -1,13 +1,96 @@
 # embeddings logic
+import os
+
+import numpy as np
 from sentence_transformers import SentenceTransformer
 
+try:
+    from backend.embedding_cache import EmbeddingCache, cache_key
+except ImportError:  # run as a script from backend/
+    from embedding_cache import EmbeddingCache, cache_key
+
+# Shared by index builds and query-time encoding; EMBEDDING_CACHE=false disables
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "data/embedding_cache.sqlite")
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "1000000"))
+
+# Model and runtime. EMBEDDING_MODEL may be a hub name or a directory written
+# by export_embeddings.py; a distilled model must keep the 384-dim output
+# (e.g. paraphrase-MiniLM-L3-v2) or the index has to be rebuilt.
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+EMBEDDING_QUANT_CONFIG = os.getenv("EMBEDDING_QUANT_CONFIG", "avx2")
+
+# torch: PyTorch fp32 | onnx: ONNX Runtime fp32 | onnx_int8: ONNX Runtime
+# with int8 dynamic quantization (onnx/model_qint8_<config>.onnx)
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx_int8")
+
+
+def load_sentence_transformer(model_name, backend="torch", quant_config=EMBEDDING_QUANT_CONFIG):
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend {backend!r}; expected one of {EMBEDDING_BACKENDS}")
+
+    if backend == "torch":
+        return SentenceTransformer(model_name)
+    if backend == "onnx":
+        return SentenceTransformer(model_name, backend="onnx")
+    return SentenceTransformer(
+        model_name,
+        backend="onnx",
+        model_kwargs={"file_name": f"onnx/model_qint8_{quant_config}.onnx"}
+    )
+
+
+def default_cache():
+    if os.getenv("EMBEDDING_CACHE", "true").lower() != "true":
+        return None
+    return EmbeddingCache(EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_MAX_ENTRIES)
+
+
 class EmbeddingModel:
-    def __init__(self, model_name="all-MiniLM-L6-v2"):
-        self.model = SentenceTransformer(model_name)
+    def __init__(self, model_name=None, cache="default", backend=None):
+        self.model_name = model_name or EMBEDDING_MODEL
+        self.backend = backend or EMBEDDING_BACKEND
+        self.model = load_sentence_transformer(self.model_name, self.backend)
+        self.cache = default_cache() if cache == "default" else cache
+
+        # Quantized vectors differ slightly, so they get their own cache keys
+        self.cache_name = self.model_name if self.backend == "torch" else f"{self.model_name}:{self.backend}"
 
-    def embed_texts(self, texts):
+    @property
+    def dim(self):
+        return self.model.get_sentence_embedding_dimension()
+
+    def _encode(self, texts, show_progress_bar=True):
         return self.model.encode(
             texts,
-            show_progress_bar=True,
+            show_progress_bar=show_progress_bar,
             normalize_embeddings=True
         )
+
+    def embed_texts(self, texts, encode=None):
+        """
+        encode replaces self._encode for the texts not in the cache
+        (index builds pass the sharded multi-process encoder).
+        """
+        encode = encode or self._encode
+        if self.cache is None:
+            return encode(texts)
+
+        keys = [cache_key(self.cache_name, text) for text in texts]
+        cached = self.cache.get_many(list(set(keys)))
+
+        # Encode each distinct uncached text once
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached:
+                missing.setdefault(key, text)
+
+        if missing:
+            vectors = encode(list(missing.values()))
+            fresh = dict(zip(missing.keys(), vectors))
+            self.cache.put_many(fresh.items())
+            cached.update(fresh)
+
+        if not keys:
+            return np.zeros((0, self.dim), dtype="float32")
+        return np.vstack([cached[key] for key in keys]).astype("float32")
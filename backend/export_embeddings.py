@@ -0,0 +1,49 @@
+"""
+Export the embedding model to ONNX, optionally with int8 dynamic quantization.
+
+    python backend/export_embeddings.py
+    python backend/export_embeddings.py --model paraphrase-MiniLM-L3-v2 --quantize avx512_vnni
+
+Then set EMBEDDING_MODEL to the output directory and EMBEDDING_BACKEND to
+onnx, or to onnx_int8 with EMBEDDING_QUANT_CONFIG matching --quantize.
+"""
+import argparse
+import os
+
+from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+from embeddings import EMBEDDING_MODEL
+
+QUANT_CONFIGS = ("arm64", "avx2", "avx512", "avx512_vnni")
+
+
+def export(model_name, output_dir, quant_config=None):
+    # backend="onnx" converts the PyTorch weights on load
+    model = SentenceTransformer(model_name, backend="onnx")
+    model.save_pretrained(output_dir)
+    print(f"Saved {output_dir}/onnx/model.onnx")
+
+    if quant_config:
+        export_dynamic_quantized_onnx_model(model, quant_config, output_dir)
+        print(f"Saved {output_dir}/onnx/model_qint8_{quant_config}.onnx")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--model", default=EMBEDDING_MODEL)
+    parser.add_argument("--output", help="default: models/<model>-onnx")
+    parser.add_argument(
+        "--quantize",
+        choices=QUANT_CONFIGS,
+        default="avx2",
+        help="int8 kernel target for the quantized copy"
+    )
+    parser.add_argument("--no-quantize", action="store_true", help="only export fp32 ONNX")
+    args = parser.parse_args()
+
+    output_dir = args.output or os.path.join("models", f"{os.path.basename(args.model.rstrip('/'))}-onnx")
+    export(args.model, output_dir, None if args.no_quantize else args.quantize)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,53 +1,222 @@
 import pandas as pd
 import os
 import glob
-from cleaning import clean_text
+import codecs
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from cleaning import clean_texts, content_hash
+from near_dup import MinHasher, cluster_near_duplicates
+
+# Rows per chunk read from disk and handed to a worker
+CHUNK_ROWS = int(os.getenv("INGEST_CHUNK_ROWS", "2000"))
+
+# Bytes read to tell UTF-8 from Latin-1 exports
+ENCODING_SAMPLE_BYTES = 1 << 20
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", str(os.cpu_count() or 1)))
+
+# MinHash/LSH near-duplicate removal (estimated Jaccard over word 5-grams)
+NEAR_DUP = os.getenv("NEAR_DUP", "true").lower() == "true"
+NEAR_DUP_THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0.9"))
+NEAR_DUP_NUM_PERM = int(os.getenv("NEAR_DUP_NUM_PERM", "128"))
+
+
+def _detect_encoding(path):
+    # Only the first block is checked; a character split at its end is fine
+    with open(path, "rb") as f:
+        sample = f.read(ENCODING_SAMPLE_BYTES)
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(sample)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "latin1"
+
+
+def _read_columns(files, encodings):
+    # Union of columns across files (like pd.concat), minus index artefacts
+    columns = []
+    for file in files:
+        header = pd.read_csv(file, nrows=0, encoding=encodings[file]).columns
+        for column in header:
+            if column not in columns and column != '' and not column.startswith('Unnamed'):
+                columns.append(column)
+    return columns
+
+
+def _read_chunks(files, columns, encodings):
+    for file in files:
+        print(f"Loading {os.path.basename(file)}...")
+        # A stray byte past the sample is replaced rather than aborting a
+        # file that is already half written out
+        reader = pd.read_csv(
+            file, encoding=encodings[file], encoding_errors="replace", chunksize=CHUNK_ROWS
+        )
+        for chunk in reader:
+            yield chunk.reindex(columns=columns)
+
+
+def _clean_and_sign(texts, num_perm=None):
+    # MinHash signatures are computed here, in the worker, as they cost
+    # more than the cleaning itself
+    texts = clean_texts(texts)
+    signatures = MinHasher(num_perm).signatures(texts) if num_perm else None
+    return texts, signatures
+
+
+def _cleaned_chunks(chunks, text_column, workers, num_perm=None):
+    """
+    Clean the text column of each chunk in a process pool, yielding
+    (chunk, signatures) in input order with a bounded number in flight.
+    signatures is None unless num_perm is set.
+    """
+    if workers <= 1:
+        for chunk in chunks:
+            chunk[text_column], signatures = _clean_and_sign(chunk[text_column].tolist(), num_perm)
+            yield chunk, signatures
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = deque()
+        for chunk in chunks:
+            in_flight.append(
+                (chunk, pool.submit(_clean_and_sign, chunk[text_column].tolist(), num_perm))
+            )
+            if len(in_flight) >= workers * 2:
+                done, future = in_flight.popleft()
+                done[text_column], signatures = future.result()
+                yield done, signatures
+        while in_flight:
+            done, future = in_flight.popleft()
+            done[text_column], signatures = future.result()
+            yield done, signatures
+
+
+def _drop_near_duplicates(output_path, id_column, signatures, threshold):
+    """
+    Cluster the rows of output_path by MinHash signature and rewrite it with
+    only the first (canonical) row of each cluster. The dropped rows are
+    listed with their cluster ID (the canonical row's ID) in
+    <output>_near_duplicates.csv. Returns the number of rows dropped.
+    """
+    canonical = cluster_near_duplicates(signatures, threshold)
+    duplicate = canonical != np.arange(len(canonical))
+
+    root, ext = os.path.splitext(output_path)
+    map_path = f"{root}_near_duplicates{ext}"
+    if os.path.exists(map_path):
+        os.remove(map_path)
+    if not duplicate.any():
+        return 0
+
+    # Read back verbatim: "NA", "null" or empty cells must not turn into NaN
+    no_na = {"keep_default_na": False, "na_filter": False}
+    ids = pd.read_csv(output_path, usecols=[id_column], dtype=str, **no_na)[id_column].to_numpy()
+    pd.DataFrame({
+        id_column: ids[duplicate],
+        "cluster_id": ids[canonical[duplicate]],
+        "similarity": (signatures[duplicate] == signatures[canonical[duplicate]]).mean(axis=1)
+    }).to_csv(map_path, index=False)
+
+    tmp_path = output_path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    offset = 0
+    for chunk in pd.read_csv(output_path, chunksize=CHUNK_ROWS, dtype={id_column: str}, **no_na):
+        keep = ~duplicate[offset:offset + len(chunk)]
+        offset += len(chunk)
+        chunk[keep].to_csv(tmp_path, mode="a", header=not os.path.exists(tmp_path), index=False)
+    os.replace(tmp_path, output_path)
+    return int(duplicate.sum())
+
+
+def clean_csv_files(files, output_path, text_column, id_column, keep_columns=None,
+                    workers=INGEST_WORKERS, near_dup_threshold=None):
+    """
+    Stream CSVs through clean_text, drop empty and duplicate texts and
+    append the survivors to output_path chunk by chunk. Duplicates are found
+    by content hash, which also becomes the stable document ID, so only the
+    hashes are held in memory.
+
+    Near-duplicates (small edits, re-uploads) are then removed with
+    MinHash/LSH when near_dup_threshold is set (default NEAR_DUP_THRESHOLD
+    if NEAR_DUP is on); this keeps one NEAR_DUP_NUM_PERM-wide uint32
+    signature per written row in memory.
+    """
+    if near_dup_threshold is None and NEAR_DUP:
+        near_dup_threshold = NEAR_DUP_THRESHOLD
+    num_perm = NEAR_DUP_NUM_PERM if near_dup_threshold else None
+
+    encodings = {file: _detect_encoding(file) for file in files}
+    columns = _read_columns(files, encodings)
+    if keep_columns:
+        columns = [c for c in keep_columns if c in columns]
+
+    seen = set()
+    kept_signatures = []
+    rows_in = rows_out = 0
+    start = time.perf_counter()
+
+    if os.path.exists(output_path):
+        os.remove(output_path)
+
+    chunks = _read_chunks(files, columns, encodings)
+    chunks = _cleaned_chunks(chunks, text_column, workers, num_perm)
+    for chunk, signatures in chunks:
+        rows_in += len(chunk)
+
+        # Remove empty texts
+        nonempty = (chunk[text_column].str.strip() != '').to_numpy()
+        chunk = chunk[nonempty]
+
+        # Deduplicate (within the chunk and against everything written so far)
+        ids = chunk[text_column].map(content_hash)
+        keep = ~ids.duplicated() & ~ids.isin(seen)
+        chunk = chunk[keep]
+        seen.update(ids[keep])
+        if signatures is not None:
+            kept_signatures.append(signatures[nonempty][keep.to_numpy()])
+
+        chunk.insert(0, id_column, ids[keep])
+        chunk.to_csv(output_path, mode="a", header=not os.path.exists(output_path), index=False)
+        rows_out += len(chunk)
+
+    elapsed = time.perf_counter() - start
+    rate = rows_in / elapsed if elapsed > 0 else 0.0
+    print(f"Rows read: {rows_in}  kept: {rows_out}  ({rate:,.0f} rows/sec, {workers} workers)")
+
+    if kept_signatures and rows_out:
+        start = time.perf_counter()
+        dropped = _drop_near_duplicates(
+            output_path, id_column, np.concatenate(kept_signatures), near_dup_threshold
+        )
+        rows_out -= dropped
+        print(
+            f"Near-duplicates dropped: {dropped} (threshold {near_dup_threshold}, "
+            f"{time.perf_counter() - start:.2f}s)"
+        )
+    return rows_in, rows_out
+
 
 def ingest_and_clean_data():
     # Paths
     base_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     jd_dir = os.path.join(base_path, 'data', 'job_descriptions')
     resume_dir = os.path.join(base_path, 'data', 'resumes')
-    
+
     output_dir = os.path.join(base_path, 'data', 'cleaned')
     os.makedirs(output_dir, exist_ok=True)
 
     print("--- Cleaning Job Descriptions ---")
     jd_files = glob.glob(os.path.join(jd_dir, "*.csv"))
     if jd_files:
-        df_list = []
-        for file in jd_files:
-            print(f"Loading {os.path.basename(file)}...")
-            try:
-                df = pd.read_csv(file, encoding='utf-8')
-            except UnicodeDecodeError:
-                df = pd.read_csv(file, encoding='latin1')
-            df_list.append(df)
-        
-        df_jd = pd.concat(df_list, ignore_index=True)
-            
-        # Remove any columns that are empty or named 'Unnamed: 0'
-        df_jd = df_jd.loc[:, ~df_jd.columns.str.contains('^Unnamed')]
-        if '' in df_jd.columns:
-            df_jd = df_jd.drop('', axis=1)
-
-        print(f"Original JD count (combined): {len(df_jd)}")
-        
-        # Clean the 'Job Description' column
-        df_jd['Job Description'] = df_jd['Job Description'].apply(clean_text)
-        
-        # Remove empty descriptions
-        df_jd = df_jd[df_jd['Job Description'].str.strip() != '']
-        
-        # Deduplicate
-        df_jd = df_jd.drop_duplicates(subset=['Job Description'])
-        
-        # Add unique ID for RAG tracking
-        df_jd.insert(0, "jd_id", range(len(df_jd)))
-        
-        print(f"Cleaned JD count: {len(df_jd)}")
-        
-        df_jd.to_csv(os.path.join(output_dir, 'job_descriptions_cleaned.csv'), index=False)
+        # Stable content-hash ID for RAG tracking
+        clean_csv_files(
+            jd_files,
+            os.path.join(output_dir, 'job_descriptions_cleaned.csv'),
+            text_column='Job Description',
+            id_column='jd_id'
+        )
         print("Saved combined cleaned job descriptions.")
     else:
         print(f"No Job Description CSV files found in {jd_dir}")
@@ -56,43 +225,15 @@ def ingest_and_clean_data():
     resume_files = glob.glob(os.path.join(resume_dir, "*.csv"))
 
     if resume_files:
-        df_list = []
-        for file in resume_files:
-            print(f"Loading {os.path.basename(file)}...")
-            try:
-                df = pd.read_csv(file, encoding='utf-8')
-            except UnicodeDecodeError:
-                df = pd.read_csv(file, encoding='latin1')
-            df_list.append(df)
-
-        df_resume = pd.concat(df_list, ignore_index=True)
-
         # ✅ EXPLICITLY KEEP REQUIRED COLUMNS
-        required_columns = ["Resume", "Category", "Name"]
-        available_columns = [c for c in required_columns if c in df_resume.columns]
-        df_resume = df_resume[available_columns]
-
-        print(f"Original Resume count (combined): {len(df_resume)}")
-
-        # Clean Resume text
-        df_resume["Resume"] = df_resume["Resume"].apply(clean_text)
-
-        # Remove empty resumes
-        df_resume = df_resume[df_resume["Resume"].str.strip() != ""]
-
-        # Deduplicate
-        df_resume = df_resume.drop_duplicates(subset=["Resume"])
-
-        # Add unique ID
-        df_resume.insert(0, "resume_id", range(len(df_resume)))
-
-        print(f"Cleaned Resume count: {len(df_resume)}")
-
-        df_resume.to_csv(
+        # Stable content-hash ID (unchanged resumes keep their ID across runs)
+        clean_csv_files(
+            resume_files,
             os.path.join(output_dir, "resumes_cleaned.csv"),
-            index=False
+            text_column="Resume",
+            id_column="resume_id",
+            keep_columns=["Resume", "Category", "Name"]
         )
-
         print("Saved combined cleaned resumes.")
     else:
         print(f"No Resume CSV files found in {resume_dir}")
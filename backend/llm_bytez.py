@@ -1,4 +1,6 @@
+import asyncio
 import os
+from concurrent.futures import ThreadPoolExecutor
 from bytez import Bytez
 
 BYTEZ_API_KEY = os.getenv("BYTEZ_API_KEY")
@@ -9,6 +11,13 @@ sdk = Bytez(BYTEZ_API_KEY)
 
 MODEL_NAME = "microsoft/Phi-3-mini-4k-instruct"
 
+# The SDK call cannot be cancelled: a call abandoned after LLM_TIMEOUT keeps
+# its thread until Bytez answers. A dedicated pool of LLM_MAX_CONCURRENCY
+# threads caps how many such calls pile up; later calls queue behind them.
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("LLM_MAX_CONCURRENCY", "4")), thread_name_prefix="bytez"
+)
+
 def _extract_text(output):
     """
     Normalize Bytez output into a plain string.
@@ -61,3 +70,13 @@ def call_llm(prompt: str) -> str:
 
     # Absolute fallback
     return str(response).strip()
+
+
+async def acall_llm(prompt: str) -> str:
+    # The Bytez SDK is blocking; run it off the event loop
+    return await asyncio.get_running_loop().run_in_executor(_executor, call_llm, prompt)
+
+
+async def astream_llm(prompt: str):
+    # No token streaming in the SDK: emit the whole response as one piece
+    yield await acall_llm(prompt)
@@ -1,19 +1,65 @@
+import json
+import os
+
+import httpx
 import requests
 
-OLLAMA_URL = "http://localhost:11434/api/generate"
+# Any Ollama-compatible /api/generate (backend/stub_llm.py for load tests)
+OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434/api/generate")
 MODEL_NAME = "llama3"
+REQUEST_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "120"))
+
+_async_client = None
+
+
+def _payload(prompt: str, stream: bool = False) -> dict:
+    return {
+        "model": MODEL_NAME,
+        "prompt": prompt,
+        "stream": stream
+    }
+
 
 def call_llm(prompt: str) -> str:
     response = requests.post(
         OLLAMA_URL,
-        json={
-            "model": MODEL_NAME,
-            "prompt": prompt,
-            "stream": False
-        },
-        timeout=120
+        json=_payload(prompt),
+        timeout=REQUEST_TIMEOUT
     )
 
     response.raise_for_status()
     return response.json()["response"]
 
+
+def _get_async_client():
+    # One pooled client per process so concurrent calls reuse connections
+    global _async_client
+    if _async_client is None:
+        _async_client = httpx.AsyncClient(timeout=REQUEST_TIMEOUT)
+    return _async_client
+
+
+async def acall_llm(prompt: str) -> str:
+    response = await _get_async_client().post(OLLAMA_URL, json=_payload(prompt))
+
+    response.raise_for_status()
+    return response.json()["response"]
+
+
+async def astream_llm(prompt: str):
+    """
+    Yield response text pieces as Ollama generates them ("stream": true
+    sends one JSON object per line until "done").
+    """
+    async with _get_async_client().stream(
+        "POST", OLLAMA_URL, json=_payload(prompt, stream=True)
+    ) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if not line:
+                continue
+            part = json.loads(line)
+            if part.get("response"):
+                yield part["response"]
+            if part.get("done"):
+                break
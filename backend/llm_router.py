@@ -1,15 +1,226 @@
+import asyncio
+import hashlib
 import os
+import sqlite3
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+
+from backend import metrics
+
+# Per-call timeout (seconds) and max in-flight LLM calls per process
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "120"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+
+# Response cache: in-memory LRU, plus SQLite when LLM_CACHE_PATH is set
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "1024"))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(24 * 3600)))
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH")
+
+# Expired SQLite rows are deleted on open and then once every this many puts
+LLM_CACHE_EXPIRE_EVERY = 256
 
-def get_llm_backend():
-    use_bytez = os.getenv("USE_BYTEZ", "true").lower() == "true"
 
-    if use_bytez:
+def _use_bytez():
+    return os.getenv("USE_BYTEZ", "true").lower() == "true"
+
+
+def get_llm_backend():
+    """
+    The selected backend module (call_llm / acall_llm / astream_llm / MODEL_NAME).
+    """
+    if _use_bytez():
         print("[LLM BACKEND] Using Bytez (hosted)")
-        from backend.llm_bytez import call_llm
+        from backend import llm_bytez as backend
     else:
         print("[LLM BACKEND] Using Ollama (local)")
-        from backend.llm_ollama import call_llm
+        from backend import llm_ollama as backend
+
+    return backend
+
+
+class LLMCache:
+    """
+    Bounded LRU of LLM responses with a TTL, optionally backed by SQLite so
+    entries survive restarts and are shared between worker processes.
+    """
+
+    def __init__(self, max_entries=1024, ttl=24 * 3600, path=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._puts = 0
+
+        self._conn = None
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " response TEXT NOT NULL,"
+                " created REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_created ON responses (created)")
+            self._expire(time.time())
+
+    def _remember(self, key, entry):
+        # Most recently used last; the oldest entries go past max_entries
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _expire(self, now):
+        self._conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+        self._conn.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT response, created FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row:
+                    entry = (row[0], row[1])
+                    self._remember(key, entry)
+
+            if entry is None or now - entry[1] > self.ttl:
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, response):
+        if not response:
+            return
+        now = time.time()
+        with self._lock:
+            self._remember(key, (response, now))
+
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, response, created) VALUES (?, ?, ?)",
+                    (key, response, now)
+                )
+                self._puts += 1
+                if self._puts % LLM_CACHE_EXPIRE_EVERY == 0:
+                    self._expire(now)
+                else:
+                    self._conn.commit()
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+_backend = get_llm_backend()
+BACKEND_NAME = "bytez" if _use_bytez() else "ollama"
+llm_cache = LLMCache(LLM_CACHE_SIZE, LLM_CACHE_TTL, LLM_CACHE_PATH)
+
+
+@contextmanager
+def _backend_call():
+    """
+    Times one backend call (cache hits are not counted) and counts it by
+    outcome: ok, error, or cancelled (timed out or client went away).
+    """
+    outcome = "error"
+    try:
+        with metrics.stage("llm"):
+            yield
+        outcome = "ok"
+    except (asyncio.CancelledError, GeneratorExit):
+        outcome = "cancelled"
+        raise
+    finally:
+        metrics.LLM_CALLS.inc(backend=BACKEND_NAME, outcome=outcome)
+
+
+# One semaphore per event loop (a semaphore is bound to the loop it first
+# waits on), bounding in-flight backend calls across all requests
+_llm_slots = weakref.WeakKeyDictionary()
+
+
+@asynccontextmanager
+async def _llm_slot():
+    """
+    Holds one of the LLM_MAX_CONCURRENCY backend slots; the wait is timed
+    as the "llm_queue" stage. Cache hits never take a slot.
+    """
+    loop = asyncio.get_running_loop()
+    slots = _llm_slots.get(loop)
+    if slots is None:
+        slots = _llm_slots[loop] = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+
+    with metrics.stage("llm_queue"):
+        await slots.acquire()
+    try:
+        yield
+    finally:
+        slots.release()
+
+
+def cache_key(prompt: str, prompt_version: str = "") -> str:
+    """
+    Hash of model, prompt template version and the rendered prompt (which
+    embeds all the inputs).
+    """
+    raw = f"{_backend.MODEL_NAME}\0{prompt_version}\0{prompt}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def call_llm(prompt: str, prompt_version: str = "", bypass_cache: bool = False) -> str:
+    # bypass_cache skips the lookup but still stores the fresh response
+    key = cache_key(prompt, prompt_version)
+    if not bypass_cache:
+        cached = llm_cache.get(key)
+        if cached is not None:
+            return cached
+
+    with _backend_call():
+        response = _backend.call_llm(prompt)
+    llm_cache.put(key, response)
+    return response
+
+
+async def acall_llm(prompt: str, prompt_version: str = "", bypass_cache: bool = False) -> str:
+    key = cache_key(prompt, prompt_version)
+    if not bypass_cache:
+        cached = llm_cache.get(key)
+        if cached is not None:
+            return cached
+
+    async with _llm_slot():
+        with _backend_call():
+            response = await _backend.acall_llm(prompt)
+    llm_cache.put(key, response)
+    return response
+
 
-    return call_llm
+async def astream_llm(prompt: str, prompt_version: str = "", bypass_cache: bool = False):
+    key = cache_key(prompt, prompt_version)
+    if not bypass_cache:
+        cached = llm_cache.get(key)
+        if cached is not None:
+            yield cached
+            return
 
-call_llm = get_llm_backend()
+    # Only a stream that runs to completion is cached
+    parts = []
+    async with _llm_slot():
+        with _backend_call():
+            async for token in _backend.astream_llm(prompt):
+                parts.append(token)
+                yield token
+    llm_cache.put(key, "".join(parts))
@@ -1,13 +1,30 @@
-from fastapi import FastAPI
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 
+from backend import metrics
+from backend.resources import AppResources
+
 from backend.api.health import router as health_router
 from backend.api.match import router as match_router
 from backend.api.explain import router as explain_router
+from backend.api.metrics import router as metrics_router
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One embedder / index / LLM client per process, shared by all routers
+    app.state.resources = AppResources()
+    app.state.resources.start_loading()
+    yield
+
 
 app = FastAPI(
     title="Resume RAG API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -22,6 +39,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def record_latency(request: Request, call_next):
+    # Time to response start; streamed bodies are still being sent after this
+    start = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    metrics.HTTP_REQUEST_SECONDS.observe(
+        time.perf_counter() - start,
+        method=request.method,
+        path=route.path if route else "unmatched",
+        status=response.status_code
+    )
+    return response
+
+
 app.include_router(health_router)
 app.include_router(match_router)
 app.include_router(explain_router)
+app.include_router(metrics_router)
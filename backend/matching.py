@@ -1,37 +1,149 @@
+import asyncio
+import os
+
+import numpy as np
+
+from backend import metrics
+from backend.batching import MicroBatcher
 from backend.embeddings import EmbeddingModel
 from backend.vector_store import VectorStore
-from backend.llm_router import call_llm
+from backend.llm_router import call_llm, acall_llm, astream_llm, LLM_TIMEOUT
+from backend.prompts import ExplainPrompt, explain_prompt
+
+# vector: FAISS only | hybrid: vector + BM25 fused by reciprocal rank |
+# prefilter: BM25 candidates re-scored by exact cosine
+RETRIEVAL_MODES = ("vector", "hybrid", "prefilter")
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "vector")
+
+# Exact second stage: shortlist resumes from a shallow search (RERANK_DEPTH x
+# top_k chunk hits), then score the JD against every chunk of each of them.
+# Resumes rank by RERANK_ALPHA * max-sim + (1 - RERANK_ALPHA) * mean-sim.
+RERANK_EXACT = os.getenv("RERANK_EXACT", "false").lower() == "true"
+RERANK_DEPTH = int(os.getenv("RERANK_DEPTH", "3"))
+RERANK_ALPHA = float(os.getenv("RERANK_ALPHA", "0.7"))
+
+# Best chunks per resume kept as evidence (the explain prompt uses 5)
+RERANK_TOP_CHUNKS = 5
+
+# Concurrent /match requests are ranked together: JDs arriving within
+# MATCH_BATCH_MAX_WAIT_MS share one encoder call and one FAISS search.
+# MATCH_BATCH_MAX_SIZE=1 turns this off.
+MATCH_BATCH_MAX_SIZE = int(os.getenv("MATCH_BATCH_MAX_SIZE", "32"))
+MATCH_BATCH_MAX_WAIT_MS = float(os.getenv("MATCH_BATCH_MAX_WAIT_MS", "5"))
 
 
 class ResumeMatcher:
-    def __init__(self):
-        self.embedder = EmbeddingModel()
-        self.store = VectorStore(dim=384)
-        self.store.load()
-        
-    def match(self, job_id: str, job_description: str, top_k: int = 5):
+    def __init__(self, embedder=None, store=None, llm=None, allm=None, astream=None):
+        # Pass shared instances to avoid loading the model and index twice
+        self.embedder = embedder or EmbeddingModel()
+        if store is None:
+            store = VectorStore(dim=384)
+            store.load()
+        self.store = store
+        self.llm = llm or call_llm
+        self.allm = allm or acall_llm
+        self.astream = astream or astream_llm
+        self._rank_batcher = None
+
+    def match(self, job_id: str, job_description: str, top_k: int = 5, bypass_cache: bool = False):
         ranked = self.rank_resumes(job_description, top_k=top_k)
 
+        # JD compressed once, shared by every candidate's prompt
+        jd = ExplainPrompt(job_description)
+        explanations = [
+            self.explain_match(jd, item["chunks"], bypass_cache=bypass_cache)
+            for item in ranked
+        ]
+
+        return self._match_response(job_id, ranked, explanations)
+
+    async def amatch(self, job_id: str, job_description: str, top_k: int = 5, bypass_cache: bool = False):
+        """
+        Async match: explanations for all candidates run concurrently, so
+        latency is roughly one LLM call instead of top_k of them.
+        """
+        # Embedding and FAISS search are CPU-bound; keep them off the loop
+        ranked = await self.arank_resumes(job_description, top_k)
+
+        jd = ExplainPrompt(job_description)
+        explanations = await asyncio.gather(*[
+            self.aexplain_match(jd, item["chunks"], bypass_cache=bypass_cache)
+            for item in ranked
+        ])
+
+        return self._match_response(job_id, ranked, explanations)
+
+    async def amatch_stream(self, job_id: str, job_description: str, top_k: int = 5,
+                            bypass_cache: bool = False):
+        """
+        Yield match events as they become available: one "rankings" event
+        with scores and sections straight after retrieval, then "token"
+        events while each explanation is generated and one "explanation"
+        event per candidate when it completes (in completion order).
+        """
+        ranked = await self.arank_resumes(job_description, top_k)
+
+        rankings = self._match_response(job_id, ranked, [None] * len(ranked))
+        for result in rankings["top_matches"]:
+            del result["explanation"]
+        yield {"event": "rankings", **rankings}
+
+        queue = asyncio.Queue()
+        jd = ExplainPrompt(job_description)
+
+        async def explain(item):
+            parts = []
+            try:
+                async for token in astream_explain_match(
+                    jd, item["chunks"],
+                    astream=self.astream, bypass_cache=bypass_cache
+                ):
+                    parts.append(token)
+                    queue.put_nowait({
+                        "event": "token",
+                        "resume_id": item["resume_id"],
+                        "text": token
+                    })
+                queue.put_nowait({
+                    "event": "explanation",
+                    "resume_id": item["resume_id"],
+                    "explanation": "".join(parts)
+                })
+            except Exception as e:
+                queue.put_nowait({
+                    "event": "explanation",
+                    "resume_id": item["resume_id"],
+                    "explanation": "".join(parts),
+                    "error": str(e)
+                })
+
+        tasks = [asyncio.create_task(explain(item)) for item in ranked]
+        try:
+            pending = len(tasks)
+            while pending:
+                event = await queue.get()
+                if event["event"] == "explanation":
+                    pending -= 1
+                yield event
+        finally:
+            # Client went away (or we are done): stop any remaining generations
+            for task in tasks:
+                task.cancel()
+
+    @staticmethod
+    def _match_response(job_id, ranked, explanations):
         results = []
         resume_ids = set()
 
-        for item in ranked:
+        for item, explanation in zip(ranked, explanations):
             resume_ids.add(item["resume_id"])
 
-            explanation = self.explain_match(
-                job_description,
-                item["chunks"]
-            )
-
             first_meta = item["chunks"][0]["metadata"]
 
             results.append({
                 "resume_id": item["resume_id"],
                 "category": first_meta.get("category", "Unknown"),
-                "match_score": compute_match_score(
-                    item["avg_score"],
-                    item["count"]
-                ),
+                "match_score": item["match_score"],
                 "matched_sections": list(
                     {c["metadata"]["section"] for c in item["chunks"]}
                 ),
@@ -45,84 +157,338 @@ class ResumeMatcher:
             "top_matches": results
         }
 
-    def rank_resumes(self, jd_text: str, top_k: int = 10):
-        jd_embedding = self.embedder.embed_texts([jd_text])[0]
+    def rank_resumes(self, jd_text: str, top_k: int = 10, mode: str = None, rerank: bool = None):
+        return self.rank_resumes_batch([jd_text], top_k=top_k, mode=mode, rerank=rerank)[0]
 
-        results = self.store.search(
-            jd_embedding,
-            top_k=top_k * 5,
-            filter_type="resume"
+    def rank_resumes_batch(self, jd_texts: list, top_k: int = 10, mode: str = None,
+                           rerank: bool = None):
+        """
+        Rank resumes for many job descriptions at once: one batched encoder
+        call and one multi-query FAISS search. Returns one ranking per JD.
+        mode is one of RETRIEVAL_MODES (default: RETRIEVAL_MODE env); rerank
+        adds the exact per-resume second stage (default: RERANK_EXACT env).
+        """
+        mode = mode or RETRIEVAL_MODE
+        rerank = RERANK_EXACT if rerank is None else rerank
+        if mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode {mode!r}, expected one of {RETRIEVAL_MODES}")
+        if mode != "vector" and self.store.sparse is None:
+            raise ValueError(f"{mode} retrieval needs the BM25 index; rebuild with build_index.py")
+
+        with metrics.stage("embed"):
+            jd_embeddings = self.embedder.embed_texts(jd_texts)
+
+        # The exact stage fixes scores afterwards, so its search can be shallow
+        depth = top_k * (RERANK_DEPTH if rerank else 5)
+        for _ in jd_texts:
+            metrics.SEARCH_DEPTH.observe(depth, mode=mode)
+
+        if mode == "vector":
+            with metrics.stage("search"):
+                scores, rows = self.store.search_raw_batch(
+                    jd_embeddings,
+                    top_k=depth,
+                    filter_type="resume"
+                )
+            if rerank:
+                with metrics.stage("rerank"):
+                    return rescore_resumes_batch(self.store, jd_embeddings, rows, top_k)
+            with metrics.stage("aggregate"):
+                return [aggregate_by_resume(self.store, s, r, top_k) for s, r in zip(scores, rows)]
+
+        search = self.store.hybrid_search_batch if mode == "hybrid" else self.store.prefilter_search_batch
+        with metrics.stage("search"):
+            results_per_jd = search(jd_embeddings, jd_texts, top_k=depth, filter_type="resume")
+
+        if rerank:
+            rows = [[r["id"] for r in results] for results in results_per_jd]
+            with metrics.stage("rerank"):
+                return rescore_resumes_batch(self.store, jd_embeddings, rows, top_k)
+
+        rank_by = "rrf" if mode == "hybrid" else "score"
+        with metrics.stage("aggregate"):
+            return [group_by_resume(results, top_k, rank_by=rank_by) for results in results_per_jd]
+
+    async def amatch_batch(self, jobs: list, top_k: int = 5, explain: bool = False,
+                           bypass_cache: bool = False):
+        """
+        jobs: [{"job_id": ..., "job_description": ...}]. Explanations are
+        optional since bulk syncs usually only need the scores.
+        """
+        jd_texts = [job["job_description"] for job in jobs]
+        with metrics.stage("rank"):
+            rankings = await asyncio.to_thread(self.rank_resumes_batch, jd_texts, top_k)
+
+        async def explain_all(job, ranked):
+            if not explain:
+                return [None] * len(ranked)
+            jd = ExplainPrompt(job["job_description"])
+            return await asyncio.gather(*[
+                self.aexplain_match(jd, item["chunks"], bypass_cache=bypass_cache)
+                for item in ranked
+            ])
+
+        # All jobs' explanations share the LLM semaphore, so fan out together
+        explanations = await asyncio.gather(*[
+            explain_all(job, ranked) for job, ranked in zip(jobs, rankings)
+        ])
+
+        return [
+            self._match_response(job["job_id"], ranked, job_explanations)
+            for job, ranked, job_explanations in zip(jobs, rankings, explanations)
+        ]
+
+    def explain_match(self, jd_text, resume_chunks: list, bypass_cache: bool = False):
+        return explain_match(jd_text, resume_chunks, llm=self.llm, bypass_cache=bypass_cache)
+
+    async def arank_resumes(self, jd_text: str, top_k: int = 10):
+        """
+        rank_resumes off the event loop, micro-batched with other requests.
+        The "rank" stage includes the wait for the batch; the batch's own
+        stages (shared by every request in it) are added to the breakdown.
+        """
+        with metrics.stage("rank"):
+            if MATCH_BATCH_MAX_SIZE <= 1:
+                return await asyncio.to_thread(self.rank_resumes, jd_text, top_k)
+            ranked, timings = await self.rank_batcher().submit((jd_text, top_k))
+        metrics.record(timings)
+        return ranked
+
+    def rank_batcher(self):
+        # Created lazily, like the LLM semaphore, on the running loop
+        if self._rank_batcher is None:
+            self._rank_batcher = MicroBatcher(
+                self._rank_requests, MATCH_BATCH_MAX_SIZE, MATCH_BATCH_MAX_WAIT_MS
+            )
+        return self._rank_batcher
+
+    def rank_batching_stats(self):
+        return self._rank_batcher.stats() if self._rank_batcher else None
+
+    def _rank_requests(self, requests):
+        # Search depth depends on top_k, so rank each top_k group together
+        groups = {}
+        for i, (_, top_k) in enumerate(requests):
+            groups.setdefault(top_k, []).append(i)
+
+        metrics.RANK_BATCH_SIZE.observe(len(requests))
+        rankings = [None] * len(requests)
+        with metrics.track() as timings:
+            for top_k, positions in groups.items():
+                ranked = self.rank_resumes_batch([requests[i][0] for i in positions], top_k=top_k)
+                for i, result in zip(positions, ranked):
+                    rankings[i] = result
+        return [(ranked, timings) for ranked in rankings]
+
+    async def aexplain_match(self, jd_text, resume_chunks: list, bypass_cache: bool = False):
+        # acall_llm bounds in-flight calls to LLM_MAX_CONCURRENCY
+        return await aexplain_match(
+            jd_text, resume_chunks, allm=self.allm, bypass_cache=bypass_cache
         )
 
-        resume_groups = {}
-        for r in results:
-            resume_id = r["metadata"]["doc_id"]
-            resume_groups.setdefault(resume_id, []).append(r)
-
-        ranking_data = []
-        for resume_id, chunks in resume_groups.items():
-            scores = [c.get("score", 0) for c in chunks]
-
-            # ✅ HARD CLAMP similarity to 0–1
-            avg_score = max(0.0, min(sum(scores) / len(scores), 1.0))
 
-            ranking_data.append({
-                "resume_id": resume_id,
-                "chunks": chunks,
-                "count": len(chunks),
+def group_by_resume(results: list, top_k: int, rank_by: str = "score"):
+    """
+    Collapse chunk hits into per-resume entries ranked by avg score x count,
+    or by the sum of another per-chunk score (e.g. "rrf" for fused results).
+    avg_score is always the similarity score.
+    """
+    resume_groups = {}
+    for r in results:
+        resume_id = r["metadata"]["doc_id"]
+        resume_groups.setdefault(resume_id, []).append(r)
+
+    ranking_data = []
+    for resume_id, chunks in resume_groups.items():
+        scores = [c.get("score", 0) for c in chunks]
+
+        # ✅ HARD CLAMP similarity to 0–1
+        avg_score = max(0.0, min(sum(scores) / len(scores), 1.0))
+
+        ranking_data.append({
+            "resume_id": resume_id,
+            "chunks": chunks,
+            "count": len(chunks),
+            "avg_score": avg_score,
+            "rank_score": (
+                avg_score * len(chunks) if rank_by == "score"
+                else sum(c[rank_by] for c in chunks)
+            ),
+            "match_score": compute_match_score(avg_score, len(chunks))
+        })
+
+    ranked = sorted(
+        ranking_data,
+        key=lambda x: x["rank_score"],
+        reverse=True
+    )
+
+    return ranked[:top_k]
+
+
+def aggregate_by_resume(store, scores, rows, top_k: int):
+    """
+    group_by_resume() over one query's raw search arrays: grouping, averages
+    and top-k selection run in NumPy on the store's row -> resume codes, and
+    result dicts are only built for the chunks of the returned resumes.
+    Same entries, in the same order.
+    """
+    hit = rows >= 0
+    rows, scores = rows[hit], scores[hit]
+    if len(rows) == 0:
+        return []
+
+    codes, doc_ids = store.doc_codes()
+    resumes, first_hit, group = np.unique(codes[rows], return_index=True, return_inverse=True)
+    counts = np.bincount(group)
+    avg_scores = np.clip(np.bincount(group, weights=scores) / counts, 0.0, 1.0)
+    rank_scores = avg_scores * counts
+
+    # Everything tied with the k-th best stays in, so ties resolve by first
+    # hit exactly like the stable sort in group_by_resume
+    top = np.arange(len(resumes))
+    if len(resumes) > top_k:
+        threshold = rank_scores[np.argpartition(-rank_scores, top_k - 1)[:top_k]].min()
+        top = np.flatnonzero(rank_scores >= threshold)
+    top = top[np.lexsort((first_hit[top], -rank_scores[top]))][:top_k]
+
+    match_scores = compute_match_scores(avg_scores[top], counts[top])
+
+    # Hits are best-first, so a stable sort by group keeps score order
+    by_group = np.argsort(group, kind="stable")
+    starts = np.concatenate(([0], np.cumsum(counts)))
+
+    ranked = []
+    for g, match_score in zip(top, match_scores):
+        members = by_group[starts[g]:starts[g + 1]]
+        ranked.append({
+            "resume_id": doc_ids[resumes[g]],
+            "chunks": [store.row_result(rows[i], scores[i]) for i in members],
+            "count": int(counts[g]),
+            "avg_score": float(avg_scores[g]),
+            "rank_score": float(rank_scores[g]),
+            "match_score": float(match_score)
+        })
+    return ranked
+
+
+def rescore_resumes_batch(store, query_embeddings, candidate_rows, top_k: int,
+                          alpha: float = RERANK_ALPHA, top_chunks: int = RERANK_TOP_CHUNKS):
+    """
+    Exact second stage. For each query, the resumes owning any of its
+    candidate rows are scored against all of their chunk vectors: vectors
+    for the union of shortlisted resumes are reconstructed once and scored
+    with a single (chunks x queries) matrix multiply, then reduced per
+    resume to max-sim and mean-sim. Output is shaped like group_by_resume,
+    plus "max_score" / "mean_score"; "chunks" holds each resume's best
+    top_chunks chunks and avg_score is their mean similarity.
+    """
+    codes, doc_ids = store.doc_codes()
+    shortlists = []
+    for rows in candidate_rows:
+        rows = np.asarray(rows, dtype="int64")
+        shortlists.append(np.unique(codes[rows[rows >= 0]]))
+
+    resumes = np.unique(np.concatenate(shortlists)) if shortlists else np.zeros(0, dtype="int64")
+    if len(resumes) == 0:
+        return [[] for _ in shortlists]
+
+    rows, starts = store.document_rows(resumes)
+    vectors = store.reconstruct_rows(rows)
+    sims = vectors @ np.asarray(query_embeddings, dtype="float32").T
+
+    counts = np.diff(starts)
+    max_sims = np.maximum.reduceat(sims, starts[:-1], axis=0)
+    mean_sims = np.add.reduceat(sims, starts[:-1], axis=0) / counts[:, None]
+    rank_scores = alpha * max_sims + (1 - alpha) * mean_sims
+
+    ranked_per_query = []
+    for q, shortlist in enumerate(shortlists):
+        positions = np.searchsorted(resumes, shortlist)
+        q_scores = rank_scores[positions, q]
+        best = np.argsort(-q_scores, kind="stable")[:top_k]
+
+        ranked = []
+        for i in positions[best]:
+            resume_sims = sims[starts[i]:starts[i + 1], q]
+            order = np.argsort(-resume_sims, kind="stable")[:top_chunks]
+            avg_score = float(np.clip(resume_sims[order].mean(), 0.0, 1.0))
+            ranked.append({
+                "resume_id": doc_ids[resumes[i]],
+                "chunks": [store.row_result(rows[starts[i] + j], resume_sims[j]) for j in order],
+                "count": len(order),
                 "avg_score": avg_score,
-                "rank_score": avg_score * len(chunks)
+                "rank_score": float(rank_scores[i, q]),
+                "max_score": float(max_sims[i, q]),
+                "mean_score": float(mean_sims[i, q]),
+                # Coverage out of top_chunks, since count is capped there
+                "match_score": compute_match_score(avg_score, len(order), max_chunks=top_chunks)
             })
+        ranked_per_query.append(ranked)
+    return ranked_per_query
 
-        ranked = sorted(
-            ranking_data,
-            key=lambda x: x["rank_score"],
-            reverse=True
-        )
-
-        return ranked[:top_k]
-
-    def explain_match(self, jd_text: str, resume_chunks: list):
-        context = ""
-        for r in resume_chunks[:5]:
-            context += (
-                f"\nSection: {r['metadata'].get('section', 'General')}\n"
-                f"Content: {r['text']}\n"
-            )
-
-        prompt = f"""
-        You are an AI hiring assistant.
 
-        Analyze the candidate against the job description and respond STRICTLY in the format below.
+# Bump whenever the prompt (backend/prompts.py) changes so cached
+# explanations are not reused
+EXPLAIN_PROMPT_VERSION = "2"
 
-        Rules:
-        - Be concise
-        - Use short bullet points starting with "-" with new lines
-        - Do NOT use bold text
-        - Do NOT use markdown
-        - Do NOT use headings
-        - Plain text only 
 
-        JOB DESCRIPTION:
-        {jd_text}
+def build_explain_prompt(jd_text, resume_chunks: list):
+    """
+    jd_text is the raw JD or an ExplainPrompt prepared once per match, which
+    skips re-compressing the JD for every candidate.
+    """
+    return explain_prompt(jd_text).build(resume_chunks)
 
-        CANDIDATE RESUME:
-        {context}
 
-        RESPONSE FORMAT:
+def explain_match(jd_text, resume_chunks: list, llm=call_llm, bypass_cache=False):
+    return llm(
+        build_explain_prompt(jd_text, resume_chunks),
+        prompt_version=EXPLAIN_PROMPT_VERSION,
+        bypass_cache=bypass_cache
+    )
 
-        Fit:
-        - point
-        - point
 
-        Gaps:
-        - point (if none, write "No major gaps")
+async def aexplain_match(jd_text, resume_chunks: list, allm=acall_llm, timeout=LLM_TIMEOUT,
+                         bypass_cache=False):
+    prompt = build_explain_prompt(jd_text, resume_chunks)
+    try:
+        return await asyncio.wait_for(
+            allm(prompt, prompt_version=EXPLAIN_PROMPT_VERSION, bypass_cache=bypass_cache),
+            timeout
+        )
+    except asyncio.TimeoutError:
+        # One slow generation should not sink the whole match
+        metrics.LLM_TIMEOUTS.inc()
+        return f"Explanation unavailable: LLM did not respond within {timeout:.0f}s"
 
-        Recommendation:
-        - Hire / Maybe / No-Hire (1 line reason)
-        """
 
-        return call_llm(prompt)
+async def astream_explain_match(jd_text, resume_chunks: list, astream=astream_llm, timeout=LLM_TIMEOUT,
+                                bypass_cache=False):
+    """
+    Yield explanation text as the LLM produces it, giving up once the whole
+    generation has taken longer than timeout.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    tokens = astream(
+        build_explain_prompt(jd_text, resume_chunks),
+        prompt_version=EXPLAIN_PROMPT_VERSION,
+        bypass_cache=bypass_cache
+    )
+    try:
+        while True:
+            try:
+                token = await asyncio.wait_for(tokens.__anext__(), max(deadline - loop.time(), 0))
+            except StopAsyncIteration:
+                return
+            except asyncio.TimeoutError:
+                metrics.LLM_TIMEOUTS.inc()
+                yield f"\n[Explanation cut off: LLM did not finish within {timeout:.0f}s]"
+                return
+            yield token
+    finally:
+        await tokens.aclose()
 
 
 def compute_match_score(avg_score: float, count: int, max_chunks: int = 10):
@@ -136,3 +502,11 @@ def compute_match_score(avg_score: float, count: int, max_chunks: int = 10):
     final_score = (0.7 * avg_score) + (0.3 * coverage_score)
 
     return round(final_score * 100, 2)
+
+
+def compute_match_scores(avg_scores, counts, max_chunks: int = 10):
+    """
+    Array form of compute_match_score.
+    """
+    coverage_scores = np.minimum(counts / max_chunks, 1.0)
+    return np.round((0.7 * avg_scores + 0.3 * coverage_scores) * 100, 2)
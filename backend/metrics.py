@@ -0,0 +1,209 @@
+# Prometheus metrics and per-request stage timings
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; LLM generations reach the top buckets, searches the bottom ones
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120
+)
+
+_registry = []
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _copy(value):
+    # Histogram state is mutable; snapshot it under the metric's lock
+    return [list(value[0]), value[1], value[2]] if isinstance(value, list) else value
+
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name, description, labelnames=()):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _labels(self, key, extra=()):
+        pairs = list(zip(self.labelnames, key)) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+    def _samples(self, key, value):
+        yield f"{self.name}{self._labels(key)} {_format(value)}"
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            items = [(key, _copy(value)) for key, value in sorted(self._values.items())]
+        for key, value in items:
+            lines.extend(self._samples(key, value))
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, name, description, labelnames=()):
+        super().__init__(name, description, labelnames)
+        if not self.labelnames:
+            self._values[()] = 0
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def set(self, value, **labels):
+        # For mirroring totals another object already keeps (cache stats)
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, description, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, description, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            if i < len(self.buckets):
+                state[0][i] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _samples(self, key, value):
+        counts, total, count = value
+        cumulative = 0
+        for bound, n in zip(self.buckets, counts):
+            cumulative += n
+            yield f"{self.name}_bucket{self._labels(key, [('le', _format(bound))])} {cumulative}"
+        yield f"{self.name}_bucket{self._labels(key, [('le', '+Inf')])} {count}"
+        yield f"{self.name}_sum{self._labels(key)} {_format(total)}"
+        yield f"{self.name}_count{self._labels(key)} {count}"
+
+
+def render():
+    """
+    All registered metrics in the Prometheus text exposition format.
+    """
+    return "\n".join(metric.render() for metric in _registry) + "\n"
+
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "interviewai_http_request_duration_seconds", "HTTP request latency.",
+    ("method", "path", "status")
+)
+STAGE_SECONDS = Histogram(
+    "interviewai_stage_duration_seconds",
+    "Latency of one pipeline stage (embed, search, aggregate, rerank, rank, llm, ...).",
+    ("stage",)
+)
+LLM_CALLS = Counter(
+    "interviewai_llm_calls_total", "LLM backend calls by outcome (ok, error).",
+    ("backend", "outcome")
+)
+LLM_TIMEOUTS = Counter(
+    "interviewai_llm_timeouts_total", "Explanations abandoned after LLM_TIMEOUT."
+)
+CACHE_LOOKUPS = Counter(
+    "interviewai_cache_lookups_total", "Cache lookups by cache (llm, embedding) and result.",
+    ("cache", "result")
+)
+SEARCH_DEPTH = Histogram(
+    "interviewai_search_depth", "Chunk hits requested per query from the index.",
+    ("mode",), buckets=(10, 25, 50, 100, 250, 500, 1000, 2500)
+)
+RANK_BATCH_SIZE = Histogram(
+    "interviewai_rank_batch_size", "Job descriptions ranked per batched search.",
+    buckets=(1, 2, 4, 8, 16, 32, 64)
+)
+INDEX_VECTORS = Gauge("interviewai_index_vectors", "Vectors in the FAISS index.")
+INDEX_CHUNKS = Gauge("interviewai_index_chunks", "Chunk rows in the store, deleted included.")
+
+
+# Per-request breakdown: track() installs a dict that stage() adds to.
+# asyncio tasks and to_thread copy the context, so stages run for the
+# request in other tasks or threads are included.
+_timings = contextvars.ContextVar("timings", default=None)
+
+
+@contextmanager
+def track():
+    """
+    Collect stage durations (seconds) for everything run inside the block;
+    "total" is the block's wall time. Stages run concurrently (several LLM
+    calls) are summed.
+    """
+    timings = {}
+    token = _timings.set(timings)
+    start = time.perf_counter()
+    try:
+        yield timings
+    finally:
+        timings["total"] = time.perf_counter() - start
+        _timings.reset(token)
+
+
+def record(timings):
+    """
+    Add durations measured elsewhere (e.g. by a shared batch) to the
+    current request's breakdown, without observing them again.
+    """
+    current = _timings.get()
+    if current is None:
+        return
+    for name, seconds in timings.items():
+        if name != "total":
+            current[name] = current.get(name, 0.0) + seconds
+
+
+@contextmanager
+def stage(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=name)
+        record({name: elapsed})
+
+
+def timings_ms(timings):
+    return {name: round(seconds * 1000, 2) for name, seconds in timings.items()}
@@ -0,0 +1,131 @@
+# MinHash + LSH near-duplicate detection
+import zlib
+
+import numpy as np
+
+_MERSENNE = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+# LSH buckets up to this size are compared pairwise; larger ones (templated
+# texts) only against their first row, to stay near-linear
+SMALL_BUCKET = 16
+
+
+def shingles(text, size=5):
+    """
+    Distinct word size-grams; texts shorter than size are one shingle.
+    """
+    words = text.lower().split()
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+class MinHasher:
+    """
+    MinHash signatures over word shingles. The fraction of equal positions
+    in two signatures estimates the Jaccard similarity of their shingle
+    sets. Seeded, so every worker process produces the same signatures.
+    """
+
+    def __init__(self, num_perm=128, shingle_size=5, seed=1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _MERSENNE, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _MERSENNE, size=num_perm, dtype=np.uint64)
+
+    def signature(self, text):
+        grams = shingles(text, self.shingle_size)
+        if not grams:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint32)
+        hashes = np.fromiter(
+            (zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams)
+        )
+        # (a * x + b) mod p per permutation; uint64 products wrap, which
+        # is fine for a hash family
+        permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE & _MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+
+    def signatures(self, texts):
+        if not texts:
+            return np.zeros((0, self.num_perm), dtype=np.uint32)
+        return np.vstack([self.signature(text) for text in texts])
+
+
+def lsh_params(threshold, num_perm, recall=0.95):
+    """
+    (bands, rows) with bands * rows = num_perm: the most rows per band
+    (fewest false candidates) that still makes a pair at exactly the
+    threshold a candidate with probability >= recall.
+    """
+    options = [(num_perm // r, r) for r in range(1, num_perm + 1) if num_perm % r == 0]
+    ok = [(b, r) for b, r in options if 1 - (1 - threshold ** r) ** b >= recall]
+    return max(ok, key=lambda br: br[1]) if ok else (num_perm, 1)
+
+
+def _bucket_pairs(keys, all_pairs_max=SMALL_BUCKET):
+    """
+    Candidate pairs among rows with equal keys: every pair in buckets of up
+    to all_pairs_max rows, each member with the bucket's first row in
+    larger ones.
+    """
+    _, head, bucket = np.unique(keys, return_index=True, return_inverse=True)
+    bucket = bucket.ravel()
+    sizes = np.bincount(bucket)
+    order = np.argsort(bucket, kind="stable")
+    order_bucket = bucket[order]
+
+    pairs = []
+    small = sizes[order_bucket] <= all_pairs_max
+    for d in range(1, min(all_pairs_max, len(order))):
+        same = (order_bucket[d:] == order_bucket[:-d]) & small[d:]
+        pairs.append(np.stack([order[:-d][same], order[d:][same]], axis=1))
+
+    large = ~small & (order != head[order_bucket])
+    pairs.append(np.stack([head[order_bucket[large]], order[large]], axis=1))
+    return np.concatenate(pairs)
+
+
+def cluster_near_duplicates(signatures, threshold=0.9, recall=0.95):
+    """
+    Cluster rows whose estimated Jaccard similarity is >= threshold.
+    Returns an int array mapping each row to its cluster's canonical row
+    (the first row of the cluster). Rows are bucketed by their exact
+    signature values in each LSH band; only rows sharing a bucket are
+    compared (see _bucket_pairs).
+    """
+    n, num_perm = signatures.shape
+    parent = np.arange(n)
+    if n < 2:
+        return parent
+
+    bands, rows = lsh_params(threshold, num_perm, recall)
+    signatures = np.ascontiguousarray(signatures, dtype=np.uint32)
+    band_key = np.dtype((np.void, rows * signatures.itemsize))
+
+    pairs = []
+    for band in range(bands):
+        block = np.ascontiguousarray(signatures[:, band * rows:(band + 1) * rows])
+        pairs.append(_bucket_pairs(block.view(band_key).ravel()))
+
+    pairs = np.unique(np.sort(np.concatenate(pairs), axis=1), axis=0)
+    if len(pairs) == 0:
+        return parent
+
+    similarity = (signatures[pairs[:, 0]] == signatures[pairs[:, 1]]).mean(axis=1)
+    pairs = pairs[similarity >= threshold]
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    # Union by smallest row, so each cluster's root is its first row
+    for i, j in pairs:
+        ri, rj = find(i), find(j)
+        if ri != rj:
+            parent[max(ri, rj)] = min(ri, rj)
+
+    return np.array([find(i) for i in range(n)])
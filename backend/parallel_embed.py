@@ -0,0 +1,119 @@
+# Multi-process, resumable embedding for index builds
+import hashlib
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+try:
+    from backend.embeddings import load_sentence_transformer
+except ImportError:  # run as a script from backend/
+    from embeddings import load_sentence_transformer
+
+EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", "1"))
+EMBED_SHARD_SIZE = int(os.getenv("EMBED_SHARD_SIZE", "4096"))
+EMBED_SHARD_DIR = os.getenv("EMBED_SHARD_DIR", "data/embedding_shards")
+
+_worker_model = None
+
+
+def _init_worker(model_name, backend, threads):
+    global _worker_model
+    try:
+        import torch
+        # Split the cores between workers instead of oversubscribing them
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    _worker_model = load_sentence_transformer(model_name, backend)
+
+
+def _encode(model, texts):
+    return np.asarray(
+        model.encode(texts, show_progress_bar=False, normalize_embeddings=True),
+        dtype="float32"
+    )
+
+
+def _save_shard(path, vectors):
+    # Write-then-rename, so a crash never leaves a truncated shard behind
+    tmp = path + ".tmp.npy"
+    np.save(tmp, vectors)
+    os.replace(tmp, path)
+
+
+def _embed_shard(path, texts):
+    _save_shard(path, _encode(_worker_model, texts))
+    return path
+
+
+def _fingerprint(model_id, texts, shard_size):
+    digest = hashlib.sha1(f"{model_id}\0{shard_size}".encode("utf-8"))
+    for text in texts:
+        digest.update(text.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()[:16]
+
+
+def embed_in_shards(texts, embedder, workers=EMBED_WORKERS, shard_size=EMBED_SHARD_SIZE,
+                    shard_dir=EMBED_SHARD_DIR):
+    """
+    Encode texts in length-sorted shards of shard_size, each saved as .npy
+    under shard_dir as soon as it is done, then merge them back into input
+    order. Shards of a crashed build are reused when the same texts and
+    model are built again. workers > 1 encodes shards in a process pool.
+    Callers remove shard_dir once the index is saved.
+    """
+    if not texts:
+        return np.zeros((0, embedder.dim), dtype="float32")
+
+    # Similar lengths in a batch mean less padding per forward pass
+    order = np.argsort([len(text) for text in texts], kind="stable")
+    sorted_texts = [texts[i] for i in order]
+
+    run_dir = os.path.join(shard_dir, _fingerprint(embedder.cache_name, sorted_texts, shard_size))
+    os.makedirs(run_dir, exist_ok=True)
+
+    bounds = [(start, min(start + shard_size, len(texts))) for start in range(0, len(texts), shard_size)]
+    paths = [os.path.join(run_dir, f"shard_{i:05d}.npy") for i in range(len(bounds))]
+    pending = [i for i, path in enumerate(paths) if not os.path.exists(path)]
+
+    print(f"Embedding shards: {len(bounds)}  resumed: {len(bounds) - len(pending)}  workers: {workers}")
+    start_time = time.perf_counter()
+
+    if workers <= 1:
+        for done, i in enumerate(pending, 1):
+            start, end = bounds[i]
+            _save_shard(paths[i], _encode(embedder.model, sorted_texts[start:end]))
+            print(f"  shard {done}/{len(pending)}")
+    elif pending:
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(embedder.model_name, embedder.backend, threads)
+        ) as pool:
+            futures = [
+                pool.submit(_embed_shard, paths[i], sorted_texts[bounds[i][0]:bounds[i][1]])
+                for i in pending
+            ]
+            for done, future in enumerate(as_completed(futures), 1):
+                future.result()
+                print(f"  shard {done}/{len(pending)}")
+
+    elapsed = time.perf_counter() - start_time
+    encoded = sum(bounds[i][1] - bounds[i][0] for i in pending)
+    if encoded:
+        print(f"Encoded {encoded} chunks in {elapsed:.1f}s ({encoded / elapsed:,.0f} chunks/sec)")
+
+    # Merge back into input order
+    embeddings = np.empty((len(texts), embedder.dim), dtype="float32")
+    for (start, end), path in zip(bounds, paths):
+        embeddings[order[start:end]] = np.load(path)
+    return embeddings
+
+
+def clear_shards(shard_dir=EMBED_SHARD_DIR):
+    shutil.rmtree(shard_dir, ignore_errors=True)
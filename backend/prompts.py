@@ -0,0 +1,230 @@
+# token-budgeted LLM prompts: explain-match and RAG questions
+import math
+import os
+
+try:
+    from backend.chunking import get_section_parser, split_sentences
+except ImportError:  # run as a script from backend/
+    from chunking import get_section_parser, split_sentences
+
+# Whole-prompt budget and the share of it the job description may use, in
+# estimated LLM tokens. Resume evidence gets what is left.
+EXPLAIN_PROMPT_TOKENS = int(os.getenv("EXPLAIN_PROMPT_TOKENS", "1024"))
+EXPLAIN_JD_TOKENS = int(os.getenv("EXPLAIN_JD_TOKENS", "300"))
+
+# No tokenizer for the hosted/local LLM here; ~3.5 characters per token is a
+# conservative estimate for English with Llama/Phi-style vocabularies.
+CHARS_PER_TOKEN = 3.5
+
+# JD sections in the order they are kept when the budget runs out;
+# anything else (company blurb, "General") comes last
+JD_PRIORITY = [
+    "Requirements",
+    "Basic Qualifications",
+    "Qualifications",
+    "Preferred Qualifications",
+    "Responsibilities",
+]
+
+# Chunk overlaps shorter than this are treated as coincidence
+MIN_OVERLAP_CHARS = 20
+
+# Instructions and JD come first and are identical for every candidate of a
+# match, so the LLM server can reuse their KV cache; the candidate goes last.
+PREFIX_TEMPLATE = """You are an AI hiring assistant.
+
+Analyze the candidate against the job requirements and respond STRICTLY in the format below.
+
+Rules:
+- Be concise
+- Use short bullet points starting with "-" with new lines
+- Do NOT use bold text
+- Do NOT use markdown
+- Do NOT use headings
+- Plain text only
+
+RESPONSE FORMAT:
+
+Fit:
+- point
+- point
+
+Gaps:
+- point (if none, write "No major gaps")
+
+Recommendation:
+- Hire / Maybe / No-Hire (1 line reason)
+
+JOB REQUIREMENTS:
+{jd}
+
+CANDIDATE RESUME:
+"""
+
+SUFFIX = "\nRespond in the format above."
+
+
+def estimate_tokens(text):
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def truncate_to_tokens(text, max_tokens):
+    """
+    Cut text at a word boundary to fit max_tokens (estimated).
+    """
+    max_chars = int(max_tokens * CHARS_PER_TOKEN)
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars - 3]
+    if " " in cut:
+        cut = cut[:cut.rindex(" ")]
+    return cut.rstrip() + "..."
+
+
+def compress_job_description(jd_text, max_tokens=EXPLAIN_JD_TOKENS):
+    """
+    The JD reduced to its requirements: sections are kept in JD_PRIORITY
+    order, sentence by sentence, skipping repeated sentences, until the
+    first sentence that no longer fits in max_tokens. JDs without
+    recognised headers keep their leading sentences.
+    """
+    by_section = {}
+    for part in get_section_parser("job_description").split(jd_text or ""):
+        by_section.setdefault(part["section"], []).extend(split_sentences(part["text"]))
+
+    order = [s for s in JD_PRIORITY if s in by_section]
+    order += [s for s in by_section if s not in JD_PRIORITY]
+
+    lines = []
+    seen = set()
+    remaining = max_tokens
+    for section in order:
+        label = "" if section in ("General", "Job Description") else f"{section}: "
+        kept = []
+        for sentence in by_section[section]:
+            key = " ".join(sentence.lower().split())
+            if key in seen:
+                continue
+            cost = estimate_tokens(sentence + " ") + (estimate_tokens(label) if not kept else 0)
+            if cost > remaining:
+                # A section's first sentence is cut rather than lost
+                if not kept and remaining > 32:
+                    kept.append(truncate_to_tokens(sentence, remaining - estimate_tokens(label)))
+                remaining = 0
+                break
+            seen.add(key)
+            kept.append(sentence)
+            remaining -= cost
+        if kept:
+            lines.append(label + " ".join(kept))
+        if remaining <= 0:
+            break
+
+    return "\n".join(lines)
+
+
+def _overlap(a, b):
+    """
+    Length of the longest suffix of a that is a prefix of b.
+    """
+    for k in range(min(len(a), len(b)), MIN_OVERLAP_CHARS - 1, -1):
+        if a.endswith(b[:k]):
+            return k
+    return 0
+
+
+def merge_chunks(chunks):
+    """
+    (section, text) pairs with the overlapping windows of neighbouring
+    chunks joined and contained chunks dropped, in the order of each
+    merged block's best (earliest) chunk.
+    """
+    blocks = []
+    for chunk in chunks:
+        section = chunk.get("metadata", {}).get("section", "General")
+        text = chunk["text"].strip()
+
+        for block in blocks:
+            if block[0] != section:
+                continue
+            if text in block[1]:
+                break
+            if block[1] in text:
+                block[1] = text
+                break
+            k = _overlap(block[1], text)
+            if k:
+                block[1] += text[k:]
+                break
+            k = _overlap(text, block[1])
+            if k:
+                block[1] = text + block[1][k:]
+                break
+        else:
+            blocks.append([section, text])
+
+    return [(section, text) for section, text in blocks]
+
+
+class ExplainPrompt:
+    """
+    Builds explain-match prompts for one job description. The JD is
+    compressed once and the instruction + JD prefix is shared by every
+    candidate's prompt; build() adds a candidate's de-duplicated chunks
+    within what is left of max_tokens.
+    """
+
+    def __init__(self, jd_text, max_tokens=EXPLAIN_PROMPT_TOKENS, jd_tokens=EXPLAIN_JD_TOKENS):
+        self.jd_text = jd_text
+        self.requirements = compress_job_description(jd_text, jd_tokens)
+        self.prefix = PREFIX_TEMPLATE.format(jd=self.requirements)
+        self.context_tokens = max_tokens - estimate_tokens(self.prefix) - estimate_tokens(SUFFIX)
+
+    def resume_context(self, resume_chunks, max_chunks=5):
+        parts = []
+        remaining = self.context_tokens
+        for section, text in merge_chunks(resume_chunks[:max_chunks]):
+            header = f"\nSection: {section}\nContent: "
+            cost = estimate_tokens(header + text + "\n")
+            if cost > remaining:
+                room = remaining - estimate_tokens(header + "\n")
+                if room > 32:
+                    parts.append(f"{header}{truncate_to_tokens(text, room)}\n")
+                break
+            parts.append(f"{header}{text}\n")
+            remaining -= cost
+        return "".join(parts)
+
+    def build(self, resume_chunks):
+        return self.prefix + self.resume_context(resume_chunks) + SUFFIX
+
+
+def explain_prompt(jd):
+    """
+    jd as an ExplainPrompt, so callers may pass either raw JD text or one
+    prepared for a whole match.
+    """
+    return jd if isinstance(jd, ExplainPrompt) else ExplainPrompt(jd)
+
+
+RAG_TEMPLATE = """You are an AI hiring assistant.
+
+Answer the question using only the context below. If the context does not
+contain the answer, say so.
+
+CONTEXT:
+{context}
+
+QUESTION:
+{question}
+"""
+
+
+def build_prompt(context, question, max_tokens=EXPLAIN_PROMPT_TOKENS):
+    """
+    Question-answering prompt for rag.RAGPipeline: the retrieved context is
+    cut to what max_tokens leaves after the instructions and question.
+    """
+    room = max_tokens - estimate_tokens(RAG_TEMPLATE.format(context="", question=question))
+    context = truncate_to_tokens(context, room) if room > 32 else ""
+    return RAG_TEMPLATE.format(context=context, question=question)
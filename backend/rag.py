@@ -1,8 +1,14 @@
 # retrival+llm
-from embeddings import EmbeddingModel
-from vector_store import VectorStore
-from prompts import build_prompt
-from llm import call_llm
+try:
+    from backend.embeddings import EmbeddingModel
+    from backend.vector_store import VectorStore
+    from backend.prompts import build_prompt
+    from backend.llm_router import call_llm
+except ImportError:  # run as a script from backend/
+    from embeddings import EmbeddingModel
+    from vector_store import VectorStore
+    from prompts import build_prompt
+    from llm_router import call_llm
 
 class RAGPipeline:
     def __init__(self):
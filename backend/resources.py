@@ -0,0 +1,111 @@
+# process-wide model / index / LLM container shared by the API routers
+import asyncio
+import sys
+import threading
+
+from fastapi import Request
+
+from backend.embeddings import EmbeddingModel
+from backend.vector_store import VectorStore
+
+
+class AppResources:
+    """
+    Loads the embedder and vector store once per process and hands the same
+    instances to every router. The LLM client (backend.llm_router) is
+    imported on first use, through the properties below or by load() when
+    it builds the matcher, so endpoints that only need the LLM never wait
+    for the index.
+    """
+
+    def __init__(self, index_path="data/faiss_index"):
+        self.index_path = index_path
+        self.embedder = None
+        self.store = None
+        self.ready = False
+        self.error = None
+
+        self._llm = None
+        self._allm = None
+        self._astream = None
+        self._matcher = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        with self._lock:
+            if self.ready:
+                return
+            try:
+                from backend.matching import ResumeMatcher
+
+                self.embedder = EmbeddingModel()
+                self.store = VectorStore(dim=384)
+                self.store.load(self.index_path)
+                self._matcher = ResumeMatcher(
+                    embedder=self.embedder,
+                    store=self.store,
+                    llm=self.llm,
+                    allm=self.allm,
+                    astream=self.astream
+                )
+                self.ready = True
+                self.error = None
+            except Exception as e:
+                self.error = str(e)
+                raise
+
+    def start_loading(self):
+        """
+        Load in the background so the server accepts /health while warming up.
+        """
+        def _load():
+            try:
+                self.load()
+            except Exception as e:
+                print(f"[RESOURCES] Loading failed: {e}")
+
+        threading.Thread(target=_load, daemon=True).start()
+
+    @property
+    def llm(self):
+        if self._llm is None:
+            from backend.llm_router import call_llm
+            self._llm = call_llm
+        return self._llm
+
+    @property
+    def allm(self):
+        if self._allm is None:
+            from backend.llm_router import acall_llm
+            self._allm = acall_llm
+        return self._allm
+
+    @property
+    def astream(self):
+        if self._astream is None:
+            from backend.llm_router import astream_llm
+            self._astream = astream_llm
+        return self._astream
+
+    @property
+    def llm_cache(self):
+        # None until something else has imported the LLM client (load() may
+        # still be part-way through): reading stats must not import it, as a
+        # misconfigured backend (no bytez package or key) raises on import
+        return getattr(sys.modules.get("backend.llm_router"), "llm_cache", None)
+
+    @property
+    def matcher(self):
+        # Blocks until the background load finishes (or retries a failed one)
+        self.load()
+        return self._matcher
+
+    async def amatcher(self):
+        # Wait for loading on a worker thread instead of blocking the loop
+        if not self.ready:
+            await asyncio.to_thread(self.load)
+        return self._matcher
+
+
+def get_resources(request: Request) -> AppResources:
+    return request.app.state.resources
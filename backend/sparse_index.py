@@ -0,0 +1,148 @@
+# BM25 inverted index over chunk texts
+import json
+import os
+import re
+from collections import Counter
+
+import numpy as np
+
+# On-disk layout (next to the FAISS index, rows = chunk row ids):
+#   bm25_vocab.json    {"terms": [...], "n_rows": n, "k1": .., "b": ..}
+#   bm25_offsets.npy   int64[n_terms + 1] start of each term's postings
+#   bm25_rows.npy      int32[nnz] chunk rows, grouped by term
+#   bm25_weights.npy   float32[nnz] precomputed BM25 term weight per posting
+#
+# Weights include idf and length normalisation, so scoring a query is just
+# summing the postings of its terms. Arrays are memory-mapped like the
+# chunk store.
+
+VOCAB_FILE = "bm25_vocab.json"
+
+# Keeps skill tokens whole: "c++", "c#", "node.js", "s/4hana", "ci/cd"
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#./-]*[a-z0-9+#]|[a-z0-9]")
+
+
+def tokenize(text):
+    return _TOKEN.findall(text.lower())
+
+
+class BM25Index:
+    def __init__(self, terms, offsets, rows, weights, n_rows, k1=1.2, b=0.75):
+        self.terms = terms
+        self.term_ids = {term: i for i, term in enumerate(terms)}
+        self.offsets = offsets
+        self.rows = rows
+        self.weights = weights
+        self.n_rows = n_rows
+        self.k1 = k1
+        self.b = b
+
+    @classmethod
+    def build(cls, texts, skip_rows=(), k1=1.2, b=0.75):
+        """
+        Index texts by row number; rows in skip_rows (deleted chunks) get
+        no postings.
+        """
+        skip_rows = set(skip_rows)
+        term_ids = {}
+        post_terms, post_rows, post_tf = [], [], []
+        lengths = []
+
+        for row, text in enumerate(texts):
+            if row in skip_rows:
+                lengths.append(0)
+                continue
+            tokens = tokenize(text)
+            lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                post_terms.append(term_ids.setdefault(term, len(term_ids)))
+                post_rows.append(row)
+                post_tf.append(tf)
+
+        n_rows = len(lengths)
+        post_terms = np.array(post_terms, dtype="int64")
+        post_rows = np.array(post_rows, dtype="int32")
+        post_tf = np.array(post_tf, dtype="float32")
+        lengths = np.array(lengths, dtype="float32")
+
+        n_docs = n_rows - sum(1 for row in skip_rows if row < n_rows)
+        avg_len = lengths.sum() / max(n_docs, 1)
+        df = np.bincount(post_terms, minlength=len(term_ids))
+        idf = np.log1p((n_docs - df + 0.5) / (df + 0.5)).astype("float32")
+
+        norm = k1 * (1 - b + b * lengths[post_rows] / max(avg_len, 1e-9))
+        weights = idf[post_terms] * post_tf * (k1 + 1) / (post_tf + norm)
+
+        # Group postings by term (CSR)
+        order = np.argsort(post_terms, kind="stable")
+        offsets = np.zeros(len(term_ids) + 1, dtype="int64")
+        offsets[1:] = np.cumsum(df)
+
+        return cls(
+            list(term_ids), offsets, post_rows[order], weights[order].astype("float32"),
+            n_rows, k1, b
+        )
+
+    @staticmethod
+    def exists(path):
+        return os.path.exists(os.path.join(path, VOCAB_FILE))
+
+    def save(self, path):
+        # Written beside and moved into place: the arrays may be memory maps
+        # of the very files being replaced
+        os.makedirs(path, exist_ok=True)
+        for filename, array in (("bm25_offsets.npy", self.offsets),
+                                ("bm25_rows.npy", self.rows),
+                                ("bm25_weights.npy", self.weights)):
+            target = os.path.join(path, filename)
+            with open(target + ".tmp", "wb") as f:
+                np.save(f, array)
+            os.replace(target + ".tmp", target)
+        with open(os.path.join(path, VOCAB_FILE), "w") as f:
+            json.dump({"terms": self.terms, "n_rows": self.n_rows, "k1": self.k1, "b": self.b}, f)
+
+    @classmethod
+    def load(cls, path):
+        with open(os.path.join(path, VOCAB_FILE)) as f:
+            vocab = json.load(f)
+        return cls(
+            vocab["terms"],
+            np.load(os.path.join(path, "bm25_offsets.npy"), mmap_mode="r"),
+            np.load(os.path.join(path, "bm25_rows.npy"), mmap_mode="r"),
+            np.load(os.path.join(path, "bm25_weights.npy"), mmap_mode="r"),
+            vocab["n_rows"], vocab["k1"], vocab["b"]
+        )
+
+    def scores(self, query_text):
+        """
+        BM25 score of every row for the query (distinct query terms).
+        """
+        spans = [
+            (self.offsets[i], self.offsets[i + 1])
+            for i in (self.term_ids.get(t) for t in set(tokenize(query_text)))
+            if i is not None
+        ]
+        if not spans:
+            return np.zeros(self.n_rows, dtype="float32")
+        rows = np.concatenate([self.rows[start:end] for start, end in spans])
+        weights = np.concatenate([self.weights[start:end] for start, end in spans])
+        return np.bincount(rows, weights=weights, minlength=self.n_rows).astype("float32")
+
+    def search(self, query_text, top_k=10, allowed=None):
+        """
+        Top rows by BM25 as (rows, scores), best first. allowed is an
+        optional boolean mask over rows; rows without a matching term are
+        never returned.
+        """
+        scores = self.scores(query_text)
+        if allowed is not None:
+            scores[~allowed[:self.n_rows]] = 0
+
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > top_k:
+            candidates = candidates[np.argpartition(-scores[candidates], top_k - 1)[:top_k]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return candidates, scores[candidates]
+
+    def search_batch(self, query_texts, top_k=10, allowed=None):
+        return [self.search(text, top_k, allowed) for text in query_texts]
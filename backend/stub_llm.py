@@ -0,0 +1,124 @@
+"""
+Stand-in for Ollama's /api/generate with a fixed response and a
+configurable delay, for load tests that should not depend on a real model.
+
+Point the API at it with OLLAMA_URL=http://127.0.0.1:11435/api/generate
+and USE_BYTEZ=false.
+
+    python backend/stub_llm.py --port 11435 --delay-ms 500
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_RESPONSE = """Fit:
+- Relevant experience with the core stack in the job description
+- Has delivered comparable projects
+
+Gaps:
+- No major gaps
+
+Recommendation:
+- Maybe (strong overlap, confirm depth in interview)"""
+
+
+class StubLLMServer(ThreadingHTTPServer):
+    """
+    delay_ms is the time before a non-streamed response is sent; a streamed
+    response spreads it evenly over its tokens (one per whitespace-split word).
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, delay_ms=0.0, response=DEFAULT_RESPONSE, model="llama3"):
+        super().__init__(address, _Handler)
+        self.delay = delay_ms / 1000
+        self.response = response
+        self.model = model
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/api/generate"
+
+    def start(self):
+        """
+        Serve from a daemon thread; returns self so it can be used inline.
+        """
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        if self.path != "/api/generate":
+            self.send_error(404)
+            return
+
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        server = self.server
+        with server._lock:
+            server.requests += 1
+
+        if body.get("stream"):
+            self._stream(server)
+            return
+
+        time.sleep(server.delay)
+        self._send(json.dumps({
+            "model": server.model,
+            "response": server.response,
+            "done": True
+        }).encode())
+
+    def _send(self, payload):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _stream(self, server):
+        # Ollama streams one JSON object per line, chunked
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        tokens = server.response.split(" ")
+        tokens = [t + " " for t in tokens[:-1]] + tokens[-1:]
+        for token in tokens:
+            time.sleep(server.delay / len(tokens))
+            self._chunk({"model": server.model, "response": token, "done": False})
+        self._chunk({"model": server.model, "response": "", "done": True})
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _chunk(self, part):
+        line = (json.dumps(part) + "\n").encode()
+        self.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+        self.wfile.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--delay-ms", type=float, default=500.0)
+    args = parser.parse_args()
+
+    server = StubLLMServer((args.host, args.port), delay_ms=args.delay_ms)
+    print(f"Stub LLM on {server.url} (delay {args.delay_ms:.0f} ms)")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
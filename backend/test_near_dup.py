@@ -0,0 +1,31 @@
+import numpy as np
+
+from near_dup import MinHasher, cluster_near_duplicates, lsh_params
+
+num_perm = 128
+bands, rows = lsh_params(0.9, num_perm)
+rng = np.random.default_rng(0)
+
+# Rows 0 and 1 + bands are near-duplicates (they differ in one position).
+# Each row in between copies one band of row 0 and is random elsewhere, so
+# every band bucket the pair shares also holds a third, unrelated row.
+first = rng.integers(0, 1 << 32, size=num_perm, dtype=np.uint64).astype(np.uint32)
+last = first.copy()
+last[0] += 1
+fillers = rng.integers(0, 1 << 32, size=(bands, num_perm), dtype=np.uint64).astype(np.uint32)
+for band in range(bands):
+    fillers[band, band * rows:(band + 1) * rows] = first[band * rows:(band + 1) * rows]
+signatures = np.vstack([first, fillers, last])
+
+canonical = cluster_near_duplicates(signatures, threshold=0.9)
+print(f"Bands: {bands} x {rows} rows  canonical: {canonical.tolist()}")
+assert canonical[-1] == 0, "near-duplicate pair sharing buckets with a third row was missed"
+assert (canonical[1:-1] == np.arange(1, bands + 1)).all(), "unrelated rows were clustered"
+
+# End to end on text: a lightly edited copy is clustered, a different text is not
+hasher = MinHasher(num_perm)
+base = " ".join(f"word{i}" for i in range(300))
+texts = [base, base.replace("word150", "edited"), "an entirely different resume " * 20]
+print("Text clusters:", cluster_near_duplicates(hasher.signatures(texts)).tolist())
+assert cluster_near_duplicates(hasher.signatures(texts)).tolist() == [0, 0, 2]
+print("OK")
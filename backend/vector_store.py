@@ -1,60 +1,581 @@
 # faiss index
 import faiss
 import numpy as np
-import pickle
+import json
 import os
 
+try:
+    from backend.chunk_store import ChunkStore, write_chunk_store
+    from backend.sparse_index import BM25Index
+except ImportError:  # run as a script from backend/
+    from chunk_store import ChunkStore, write_chunk_store
+    from sparse_index import BM25Index
+
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw", "sq_fp16", "sq_int8")
+
+# Exact search over scalar-quantized vectors: 2 or 1 bytes per dimension
+# instead of 4. sq_int8 learns per-dimension ranges from the training set.
+SQ_SPECS = {"sq_fp16": "SQfp16", "sq_int8": "SQ8"}
+
+# Memory-map index files instead of reading them into RAM, so workers
+# serving the same index share its pages. IO_FLAG_MMAP_IFC (newer FAISS)
+# maps flat, scalar-quantized, HNSW and IVF storage; older versions only
+# have IO_FLAG_MMAP, which maps IVF lists. The two must not be combined.
+MMAP_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP)
+
+# IVF/PQ need enough vectors to train their quantizers; smaller indexes
+# are built as exact flat indexes instead.
+MIN_TRAIN_VECTORS = 1000
+
+# PQ also trains 256 centroids per sub-quantizer; FAISS wants ~39 points per
+# centroid, so smaller ivf_pq indexes are built as IVF-Flat.
+MIN_PQ_TRAIN_VECTORS = 39 * 256
+
+# Filters keeping at most this many rows are scored exactly, over just those
+# rows, on IVF and HNSW indexes: the probed lists or the graph walk would
+# reach few of them. Larger selective filters widen nprobe / efSearch by the
+# inverse of the fraction of rows they keep.
+FILTER_EXACT_ROWS = int(os.getenv("FAISS_FILTER_EXACT_ROWS", "10000"))
+
+
+def _default_nlist(n_vectors):
+    # ~4*sqrt(n) lists, keeping at least 39 training points per centroid
+    return max(1, min(int(4 * np.sqrt(n_vectors)), n_vectors // 39))
+
+
+def _default_pq_m(dim):
+    # Largest sub-quantizer count <= 48 that divides the dimension
+    # (48 for MiniLM's 384 dims, i.e. 8 dims per 1-byte code).
+    for m in range(min(48, dim), 0, -1):
+        if dim % m == 0:
+            return m
+    return 1
+
+
+def make_index(dim, index_type="flat", n_vectors=0, nlist=None, pq_m=None, hnsw_m=32):
+    """
+    Create an empty inner-product FAISS index of the requested type.
+    IVF indexes still need to be trained before vectors are added.
+    """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type {index_type!r}, expected one of {INDEX_TYPES}")
+
+    if index_type == "hnsw":
+        return faiss.index_factory(dim, f"HNSW{hnsw_m},Flat", faiss.METRIC_INNER_PRODUCT)
+
+    if index_type in SQ_SPECS:
+        return faiss.index_factory(dim, SQ_SPECS[index_type], faiss.METRIC_INNER_PRODUCT)
+
+    if index_type == "flat" or n_vectors < MIN_TRAIN_VECTORS:
+        return faiss.IndexFlatIP(dim)  # cosine similarity
+
+    nlist = nlist or _default_nlist(n_vectors)
+    if index_type == "ivf_pq" and n_vectors >= max(39 * nlist, MIN_PQ_TRAIN_VECTORS):
+        spec = f"IVF{nlist},PQ{pq_m or _default_pq_m(dim)}"
+    else:
+        spec = f"IVF{nlist},Flat"
+    return faiss.index_factory(dim, spec, faiss.METRIC_INNER_PRODUCT)
+
+
+def with_ids(index):
+    """
+    Make an index addressable by our own int64 ids (chunk row numbers) so
+    vectors can be added and removed individually. IVF stores ids natively;
+    other types are wrapped in an IndexIDMap2.
+    """
+    if isinstance(index, faiss.IndexIVF):
+        return index
+    return faiss.IndexIDMap2(index)
+
+
+def base_index(index):
+    if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        return faiss.downcast_index(index.index)
+    return index
+
+
+def search_params(index, nprobe=None, ef_search=None, sel=None):
+    """
+    Query-time knobs for whichever index type this is, as per-call
+    SearchParameters for index.search(..., params=...), so concurrent
+    queries never change the shared index. sel (a faiss.IDSelector)
+    restricts the search to those ids. None when there is nothing to set.
+    """
+    base = base_index(index)
+    if isinstance(base, faiss.IndexIVF):
+        params = faiss.SearchParametersIVF()
+        params.nprobe = nprobe or base.nprobe
+    elif isinstance(base, faiss.IndexHNSW):
+        params = faiss.SearchParametersHNSW()
+        params.efSearch = ef_search or base.hnsw.efSearch
+    elif sel is not None:
+        params = faiss.SearchParameters()
+    else:
+        return None
+    if sel is not None:
+        params.sel = sel
+    return params
+
+
 class VectorStore:
-    def __init__(self, dim):
-        self.index = faiss.IndexFlatIP(dim)  # cosine similarity
+    def __init__(self, dim, index_type=None, nprobe=None, ef_search=None, reconstruct=None):
+        self.dim = dim
         self.texts = []
         self.metadata = []
+        self.chunks = None
+
+        # Rows whose document was deleted or replaced; they are already gone
+        # from FAISS and are dropped for good on the next full rebuild.
+        self.deleted_rows = set()
+
+        # Index type and query-time parameters, configurable via env
+        self.index_type = index_type or os.getenv("FAISS_INDEX_TYPE", "flat")
+        self.nprobe = nprobe or int(os.getenv("FAISS_NPROBE", "16"))
+        self.ef_search = ef_search or int(os.getenv("FAISS_EF_SEARCH", "64"))
+        self.index = None
+
+        # Exact re-scoring (RERANK_EXACT, hybrid / prefilter retrieval) reads
+        # stored vectors back by row, which IVF indexes only support with an
+        # id -> list map; it is built when the index is trained or loaded.
+        if reconstruct is None:
+            reconstruct = (os.getenv("RERANK_EXACT", "false").lower() == "true"
+                           or os.getenv("RETRIEVAL_MODE", "vector") != "vector")
+        self.reconstruct = reconstruct
+
+        # Set by load(mmap=True); the index files are read-only until
+        # _ensure_index_in_memory() swaps them for in-RAM copies.
+        self.path = None
+        self.mmap = False
+
+        # BM25 over the same rows, for hybrid / lexically pre-filtered search
+        self.sparse = None
+
+        # Row -> document code array and its inverse (live rows grouped by
+        # document), built on first use by doc_codes() / document_rows()
+        self._doc_codes = None
+        self._doc_rows = None
+
+        # (filter_type, filter_category) -> (row mask, rows, FAISS id
+        # selector, its packed bitmap), built on first use by _filter()
+        self._filters = {}
+
+    def train(self, embeddings):
+        """
+        Create the index, sized and trained on these vectors. Must run
+        before add() for IVF types.
+        """
+        embeddings = np.array(embeddings).astype("float32")
+
+        self.index = with_ids(make_index(self.dim, self.index_type, n_vectors=len(embeddings)))
+        if not self.index.is_trained:
+            self.index.train(embeddings)
+        self._prepare_direct_map()
+
+    def _prepare_direct_map(self):
+        if not (self.reconstruct and isinstance(self.index, faiss.IndexIVF)):
+            return
+        if self.index.direct_map.type == faiss.DirectMap.NoMap:
+            self.index.set_direct_map_type(faiss.DirectMap.Hashtable)
+
+    def _ensure_writable(self):
+        # A loaded store is a read-only memory map; decode it into lists
+        # before appending (only incremental builds do this).
+        if self.chunks is not None:
+            self.texts = list(self.texts)
+            self.metadata = list(self.metadata)
+            self.chunks = None
+
+    def _ensure_index_in_memory(self):
+        # Memory-mapped indexes cannot grow or drop vectors
+        if self.mmap:
+            self._read_indexes(self.path, mmap=False)
 
     def add(self, embeddings, texts, metadata):
         embeddings = np.array(embeddings).astype("float32")
-        self.index.add(embeddings)
+        if len(embeddings) == 0:
+            return
+
+        self._ensure_writable()
+        self._ensure_index_in_memory()
+        self._doc_codes = None
+        self._doc_rows = None
+        self._filters = {}
+        start = len(self.metadata)
+        ids = np.arange(start, start + len(embeddings), dtype="int64")
+
+        if self.index is None:
+            self.train(embeddings)
+
+        self.index.add_with_ids(embeddings, ids)
         self.texts.extend(texts)
         self.metadata.extend(metadata)
 
-    def search(self, query_embedding, top_k=10, filter_type=None):
-        query_embedding = np.array([query_embedding]).astype("float32")
-        
-        # If we have a filter, we need to search much deeper to find enough candidates
-        # of the specific type, as the top results might be dominated by one type.
-        search_k = top_k * 20 if filter_type else top_k * 2
-        
-        # Cap search_k to avoid excessive overhead, but keep it large enough
-        search_k = min(max(search_k, 500), len(self.metadata))
+    # Chunks of one or more documents, as produced by chunk_document()
+    add_documents = add
 
-        scores, indices = self.index.search(query_embedding, search_k)
+    def _row_doc_ids(self):
+        if self.chunks is not None:
+            vocab = self.chunks.vocab["doc_id"]
+            return [vocab[code] for code in self.chunks.codes("doc_id")]
+        return [meta["doc_id"] for meta in self.metadata]
 
-        results = []
-        for i, idx in enumerate(indices[0]):
-            if idx == -1: continue # FAISS returns -1 if not enough neighbors found
-            
-            meta = self.metadata[idx]
-            if filter_type and meta["type"] != filter_type:
+    def document_ids(self):
+        """
+        Doc ids that currently have live chunks in the index.
+        """
+        return {
+            doc_id for row, doc_id in enumerate(self._row_doc_ids())
+            if row not in self.deleted_rows
+        }
+
+    def delete_documents(self, doc_ids):
+        """
+        Remove every chunk of the given documents from the index.
+        Returns the number of chunks removed.
+        """
+        doc_ids = set(doc_ids)
+        rows = [
+            row for row, doc_id in enumerate(self._row_doc_ids())
+            if doc_id in doc_ids and row not in self.deleted_rows
+        ]
+        if not rows:
+            return 0
+
+        ids = np.array(rows, dtype="int64")
+        self._ensure_writable()
+        self._ensure_index_in_memory()
+        try:
+            self.index.remove_ids(ids)
+        except RuntimeError as e:
+            raise ValueError(
+                f"{self.index_type} indexes do not support deletion, run a full rebuild"
+            ) from e
+
+        self.deleted_rows.update(rows)
+        self._doc_rows = None
+        self._filters = {}
+        return len(rows)
+
+    def upsert(self, embeddings, texts, metadata):
+        """
+        Replace any existing chunks of the documents in metadata with these.
+        """
+        self.delete_documents({meta["doc_id"] for meta in metadata})
+        self.add(embeddings, texts, metadata)
+
+    def build_sparse(self):
+        """
+        (Re)build the BM25 index over every live chunk row; cheap next to
+        embedding, so incremental builds simply rebuild it.
+        """
+        self.sparse = BM25Index.build(self.texts, skip_rows=self.deleted_rows)
+
+    def _build_row_mask(self, filter_type=None, filter_category=None):
+        # Live rows matching the filters, from the metadata code columns
+        # when the store is memory-mapped
+        mask = np.ones(len(self.metadata), dtype=bool)
+        if self.deleted_rows:
+            mask[np.fromiter(self.deleted_rows, dtype="int64")] = False
+
+        for field, value in (("type", filter_type), ("category", filter_category)):
+            if value is None:
                 continue
+            if self.chunks is not None:
+                vocab = self.chunks.vocab.get(field, [])
+                code = vocab.index(value) if value in vocab else -2
+                mask &= np.asarray(self.chunks.codes(field)) == code
+            else:
+                mask &= np.array([meta.get(field) == value for meta in self.metadata], dtype=bool)
+        return mask
+
+    def _filter(self, filter_type=None, filter_category=None):
+        """
+        (mask, rows, sel, bitmap) for a filter, cached until rows are added,
+        deleted or reloaded. The mask is read-only; sel reads bitmap in place.
+        """
+        key = (filter_type, filter_category)
+        cached = self._filters.get(key)
+        if cached is None:
+            mask = self._build_row_mask(filter_type, filter_category)
+            mask.flags.writeable = False
+            bitmap = np.packbits(mask, bitorder="little")
+            cached = (mask, np.flatnonzero(mask), faiss.IDSelectorBitmap(bitmap), bitmap)
+            self._filters[key] = cached
+        return cached
+
+    def _row_mask(self, filter_type=None, filter_category=None):
+        return self._filter(filter_type, filter_category)[0]
 
-            results.append({
-                "text": self.texts[idx],
-                "metadata": meta,
-                "score": float(scores[0][i])
-            })
+    def _can_reconstruct(self):
+        return not (isinstance(self.index, faiss.IndexIVF)
+                    and self.index.direct_map.type == faiss.DirectMap.NoMap)
 
-            if len(results) >= top_k:
-                break
+    def reconstruct_rows(self, rows):
+        """
+        Stored vectors of the given rows (approximate for PQ/SQ indexes).
+        IVF indexes need the store created with reconstruct=True.
+        """
+        rows = np.asarray(rows, dtype="int64")
+        if not self._can_reconstruct():
+            raise ValueError(
+                "IVF index has no direct map; set RERANK_EXACT=true or pass reconstruct=True"
+            )
+        return self.index.reconstruct_batch(rows)
 
+    def score_rows(self, query_embedding, rows):
+        """
+        Exact query similarity for specific rows, without a search.
+        """
+        if len(rows) == 0:
+            return np.zeros(0, dtype="float32")
+        return self.reconstruct_rows(rows) @ np.asarray(query_embedding, dtype="float32")
+
+    def row_result(self, row, score):
+        return {
+            "id": int(row),
+            "text": self.texts[row],
+            "metadata": self.metadata[row],
+            "score": float(score)
+        }
+
+    def sparse_search_batch(self, query_texts, top_k=10, filter_type=None, filter_category=None):
+        """
+        BM25 search; results are shaped like search() with the BM25 score.
+        """
+        allowed = self._row_mask(filter_type, filter_category)
+        return [
+            [self.row_result(row, score) for row, score in zip(rows, scores)]
+            for rows, scores in self.sparse.search_batch(query_texts, top_k, allowed)
+        ]
+
+    def hybrid_search_batch(self, query_embeddings, query_texts, top_k=10, filter_type=None,
+                            filter_category=None, rrf_k=60):
+        """
+        Reciprocal rank fusion of the vector and BM25 rankings. Each result
+        keeps its cosine "score" (computed for BM25-only hits) and gets an
+        "rrf" score, which orders the list.
+        """
+        dense = self.search_batch(query_embeddings, top_k, filter_type, filter_category)
+        sparse = self.sparse_search_batch(query_texts, top_k, filter_type, filter_category)
+
+        fused_per_query = []
+        for query_embedding, dense_results, sparse_results in zip(query_embeddings, dense, sparse):
+            fused = {}
+            for results in (dense_results, sparse_results):
+                for rank, r in enumerate(results):
+                    entry = fused.setdefault(r["id"], {**r, "rrf": 0.0})
+                    entry["rrf"] += 1.0 / (rrf_k + rank + 1)
+
+            dense_ids = {r["id"] for r in dense_results}
+            lexical_only = [row for row in fused if row not in dense_ids]
+            for row, score in zip(lexical_only, self.score_rows(query_embedding, lexical_only)):
+                fused[row]["score"] = float(score)
+
+            fused_per_query.append(
+                sorted(fused.values(), key=lambda r: r["rrf"], reverse=True)[:top_k]
+            )
+        return fused_per_query
+
+    def prefilter_search_batch(self, query_embeddings, query_texts, top_k=10, filter_type=None,
+                               filter_category=None, candidates=None):
+        """
+        Lexical pre-filter: score only the top BM25 rows (default top_k * 20)
+        by exact cosine instead of searching every vector. Queries sharing no
+        term with the corpus fall back to a vector search.
+        """
+        candidates = candidates or top_k * 20
+        allowed = self._row_mask(filter_type, filter_category)
+        lexical = self.sparse.search_batch(query_texts, candidates, allowed)
+
+        results = []
+        for query_embedding, (rows, _) in zip(query_embeddings, lexical):
+            if len(rows) == 0:
+                results.extend(self.search_batch([query_embedding], top_k, filter_type, filter_category))
+                continue
+            scores = self.score_rows(query_embedding, rows)
+            best = np.argsort(-scores, kind="stable")[:top_k]
+            results.append([self.row_result(rows[i], scores[i]) for i in best])
         return results
 
+    def search(self, query_embedding, top_k=10, filter_type=None, filter_category=None,
+               nprobe=None, ef_search=None):
+        return self.search_batch(
+            [query_embedding], top_k,
+            filter_type=filter_type,
+            filter_category=filter_category,
+            nprobe=nprobe,
+            ef_search=ef_search
+        )[0]
+
+    def search_batch(self, query_embeddings, top_k=10, filter_type=None, filter_category=None,
+                     nprobe=None, ef_search=None):
+        """
+        Search several queries with one FAISS call; returns one result list
+        per query, each shaped like search().
+        """
+        scores, indices = self.search_raw_batch(
+            query_embeddings, top_k, filter_type, filter_category, nprobe, ef_search
+        )
+        return [self._collect(s, i) for s, i in zip(scores, indices)]
+
+    def search_raw_batch(self, query_embeddings, top_k=10, filter_type=None, filter_category=None,
+                         nprobe=None, ef_search=None):
+        """
+        search_batch() without the result dicts: FAISS's (scores, rows)
+        arrays, best first, padded with -1 rows when fewer than top_k rows
+        match the filters.
+        """
+        query_embeddings = np.array(query_embeddings).astype("float32")
+        if len(query_embeddings) == 0:
+            return np.zeros((0, 0), dtype="float32"), np.zeros((0, 0), dtype="int64")
+
+        search_k = min(top_k, self.index.ntotal)
+        if search_k == 0:
+            return (np.zeros((len(query_embeddings), 0), dtype="float32"),
+                    np.zeros((len(query_embeddings), 0), dtype="int64"))
+
+        # Filters become an id selector over the one index: only matching
+        # rows are scored, so no extra depth is needed for rare types.
+        sel = None
+        nprobe = nprobe or self.nprobe
+        ef_search = ef_search or self.ef_search
+        if filter_type or filter_category:
+            _, rows, sel, _ = self._filter(filter_type, filter_category)
+            base = base_index(self.index)
+            if isinstance(base, (faiss.IndexIVF, faiss.IndexHNSW)) and len(rows) < self.index.ntotal:
+                if len(rows) <= FILTER_EXACT_ROWS and self._can_reconstruct():
+                    return self._exact_search(query_embeddings, rows, search_k)
+                widen = self.index.ntotal / len(rows)
+                if isinstance(base, faiss.IndexIVF):
+                    nprobe = min(round(nprobe * widen), base.nlist)
+                else:
+                    ef_search = min(round(ef_search * widen), len(rows))
+
+        params = search_params(self.index, nprobe, ef_search, sel)
+        # FAISS returns -1 if not enough neighbors were found
+        return self.index.search(query_embeddings, search_k, params=params)
+
+    def _exact_search(self, query_embeddings, rows, k):
+        # Brute-force inner product over the given rows, shaped like
+        # index.search(): best first, -1 rows past the last match
+        n_queries = len(query_embeddings)
+        scores = np.full((n_queries, k), -np.finfo("float32").max, dtype="float32")
+        indices = np.full((n_queries, k), -1, dtype="int64")
+        n = min(k, len(rows))
+        if n == 0:
+            return scores, indices
+
+        sims = query_embeddings @ self.reconstruct_rows(rows).T
+        top = np.argpartition(-sims, n - 1, axis=1)[:, :n]
+        top = np.take_along_axis(top, np.argsort(-np.take_along_axis(sims, top, axis=1), axis=1), axis=1)
+        scores[:, :n] = np.take_along_axis(sims, top, axis=1)
+        indices[:, :n] = rows[top]
+        return scores, indices
+
+    def doc_codes(self):
+        """
+        (codes, doc_ids): an int32 document code per row and the doc id of
+        each code, so hits can be grouped by document with NumPy.
+        """
+        if self._doc_codes is None:
+            if self.chunks is not None:
+                self._doc_codes = (np.asarray(self.chunks.codes("doc_id")), self.chunks.vocab["doc_id"])
+            else:
+                lookup = {}
+                codes = np.array(
+                    [lookup.setdefault(meta["doc_id"], len(lookup)) for meta in self.metadata],
+                    dtype="int32"
+                )
+                self._doc_codes = (codes, list(lookup))
+        return self._doc_codes
+
+    def document_rows(self, codes):
+        """
+        All live rows of the given document codes, grouped by document:
+        (rows, starts) with document i's rows at rows[starts[i]:starts[i + 1]].
+        """
+        if self._doc_rows is None:
+            doc_codes, doc_ids = self.doc_codes()
+            order = np.argsort(doc_codes, kind="stable")
+            order = order[self._row_mask()[order]]
+            bounds = np.searchsorted(doc_codes[order], np.arange(len(doc_ids) + 1))
+            self._doc_rows = (order, bounds)
+        order, bounds = self._doc_rows
+
+        codes = np.asarray(codes, dtype="int64")
+        lo, hi = bounds[codes], bounds[codes + 1]
+        starts = np.concatenate(([0], np.cumsum(hi - lo)))
+        if len(codes) == 0:
+            return np.zeros(0, dtype="int64"), starts
+        return np.concatenate([order[a:b] for a, b in zip(lo, hi)]), starts
+
+    def _collect(self, scores, indices):
+        return [self.row_result(idx, score) for score, idx in zip(scores, indices) if idx != -1]
+
 
     def save(self, path="data/faiss_index"):
         os.makedirs(path, exist_ok=True)
-        faiss.write_index(self.index, f"{path}/index.bin")
-        with open(f"{path}/store.pkl", "wb") as f:
-            pickle.dump((self.texts, self.metadata), f)
-
-    def load(self, path="data/faiss_index"):
-        self.index = faiss.read_index(f"{path}/index.bin")
-        with open(f"{path}/store.pkl", "rb") as f:
-            self.texts, self.metadata = pickle.load(f)
+        # Moved into place, as a memory-mapped index may be reading index.bin
+        faiss.write_index(self.index, f"{path}/index.bin.tmp")
+        os.replace(f"{path}/index.bin.tmp", f"{path}/index.bin")
+        write_chunk_store(path, self.texts, self.metadata)
+        np.save(f"{path}/deleted_rows.npy", np.array(sorted(self.deleted_rows), dtype="int64"))
+        if self.sparse is not None:
+            self.sparse.save(path)
+
+        # Superseded by the columnar chunk store and by filtering the main
+        # index (per-type shards)
+        for filename in os.listdir(path):
+            if filename in ("store.pkl", "shards.json") or filename.startswith("shard_"):
+                os.remove(f"{path}/{filename}")
+
+        # The index files carry their own structure; this records the
+        # configured type and query-time defaults so load() restores them.
+        with open(f"{path}/config.json", "w") as f:
+            json.dump({
+                "dim": self.dim,
+                "index_type": self.index_type,
+                "nprobe": self.nprobe,
+                "ef_search": self.ef_search
+            }, f, indent=2)
+
+    def _read_indexes(self, path, mmap):
+        flags = MMAP_FLAGS if mmap else 0
+        self.index = faiss.read_index(f"{path}/index.bin", flags)
+        self.mmap = mmap
+        self._prepare_direct_map()
+
+    def load(self, path="data/faiss_index", mmap=None):
+        """
+        mmap (default: FAISS_MMAP env, false) maps the index files instead of
+        reading them, for read-only serving; adds and deletes still work but
+        first pull the index into RAM.
+        """
+        if mmap is None:
+            mmap = os.getenv("FAISS_MMAP", "false").lower() == "true"
+        self.path = path
+
+        config_path = f"{path}/config.json"
+        if os.path.exists(config_path):
+            with open(config_path) as f:
+                config = json.load(f)
+            self.dim = config["dim"]
+            self.index_type = config["index_type"]
+            # Explicit env overrides win over the values saved at build time
+            self.nprobe = int(os.getenv("FAISS_NPROBE", config["nprobe"]))
+            self.ef_search = int(os.getenv("FAISS_EF_SEARCH", config["ef_search"]))
+
+        # Memory-mapped columns: rows are decoded only when a search returns them
+        self.chunks = ChunkStore(path)
+        self.texts = self.chunks.texts
+        self.metadata = self.chunks.metadata
+        self._doc_codes = None
+        self._doc_rows = None
+        self._filters = {}
+
+        self.deleted_rows = set()
+        if os.path.exists(f"{path}/deleted_rows.npy"):
+            self.deleted_rows = set(np.load(f"{path}/deleted_rows.npy").tolist())
+
+        self._read_indexes(path, mmap)
+        self.sparse = BM25Index.load(path) if BM25Index.exists(path) else None
@@ -33,3 +33,52 @@ export async function runResumeMatch(
 
   return res.json();
 }
+
+export type MatchStreamEvent =
+  | ({ event: "rankings" } & Omit<MatchResponse, "top_matches"> & {
+      top_matches: Omit<MatchResponse["top_matches"][number], "explanation">[];
+    })
+  | { event: "token"; resume_id: string; text: string }
+  | { event: "explanation"; resume_id: string; explanation: string; error?: string }
+  | { event: "error"; message: string };
+
+export async function streamResumeMatch(
+  jobId: string,
+  jobDescription: string,
+  onEvent: (event: MatchStreamEvent) => void
+): Promise<void> {
+  const res = await fetch(`${API_BASE_URL}/match/stream`, {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+    },
+    body: JSON.stringify({
+      job_id: jobId,
+      job_description: jobDescription,
+    }),
+  });
+
+  if (!res.ok || !res.body) {
+    const text = await res.text();
+    throw new Error(text || "Failed to run resume match");
+  }
+
+  // NDJSON: one event per line
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    const lines = buffer.split("\n");
+    buffer = lines.pop() ?? "";
+    for (const line of lines) {
+      if (line.trim()) onEvent(JSON.parse(line));
+    }
+  }
+
+  if (buffer.trim()) onEvent(JSON.parse(buffer));
+}
@@ -13,7 +13,7 @@ import JobCreationModal from '@/components/dashboard/JobCreationModal';
 import CompareModal from '@/components/dashboard/CompareModal';
 import NotificationModal from '@/components/dashboard/NotificationModal';
 import { mockJobs, mockCandidates, Candidate, Job } from '@/data/mockData';
-import { runResumeMatch } from '@/api/match.ts';
+import { streamResumeMatch } from '@/api/match.ts';
 
 const Dashboard = () => {
   const navigate = useNavigate();
@@ -76,43 +76,60 @@ const Dashboard = () => {
 
   try {
     const jobId = selectedJob || "adhoc_job";
-
-    const data = await runResumeMatch(jobId, jobDescription);
-console.log("dashborad data:",data);
-    // Map backend → frontend Candidate type
-const mappedCandidates: Candidate[] = data.top_matches.map((r, index) => ({
-  id: r.resume_id,
-
-  name:r.name || `Candidate ${index + 1}`,
-  role: selectedJob
-    ? jobs.find(j => j.id === selectedJob)?.title || "Unknown Role"
-    : "Unknown Role",
-
-  matchScore: r.match_score, // backend is 0–10, UI expects %
-
-  summary: r.explanation.slice(0, 160) + "...",
-
-  skills: r.matched_sections ?? ["General"],
-  experience: "Experience details available after interview",
-  education: "Education details available after interview",
-
-  email: "",
-  phone: "",
-  location: "",
-
-  aiExplanation: r.explanation,
-  resumeSummary: r.explanation,
-
-  status: "matched",
-}));
-
-
-    setCandidates(mappedCandidates);
-    setHasSearched(true);
+    const role = selectedJob
+      ? jobs.find(j => j.id === selectedJob)?.title || "Unknown Role"
+      : "Unknown Role";
+    let found = 0;
+
+    const updateExplanation = (resumeId: string, update: (text: string) => string) =>
+      setCandidates(prev => prev.map(c => {
+        if (c.id !== resumeId) return c;
+        const text = update(c.aiExplanation);
+        return { ...c, aiExplanation: text, resumeSummary: text };
+      }));
+
+    // Rankings arrive as soon as retrieval is done; each explanation then
+    // fills in token by token while the LLM generates it
+    await streamResumeMatch(jobId, jobDescription, (event) => {
+      switch (event.event) {
+        case "rankings":
+          found = event.top_matches.length;
+          // Map backend → frontend Candidate type
+          setCandidates(event.top_matches.map((r, index): Candidate => ({
+            id: r.resume_id,
+            name: `Candidate ${index + 1}`,
+            role,
+            matchScore: r.match_score, // backend is 0–10, UI expects %
+            skills: r.matched_sections ?? ["General"],
+            experience: "Experience details available after interview",
+            education: "Education details available after interview",
+            email: "",
+            phone: "",
+            location: "",
+            aiExplanation: "",
+            resumeSummary: "",
+            status: "matched",
+          })));
+          setHasSearched(true);
+          break;
+        case "token":
+          updateExplanation(event.resume_id, text => text + event.text);
+          break;
+        case "explanation":
+          updateExplanation(event.resume_id, () =>
+            event.error
+              ? `${event.explanation}\n(Explanation unavailable: ${event.error})`
+              : event.explanation
+          );
+          break;
+        case "error":
+          throw new Error(event.message);
+      }
+    });
 
     toast({
       title: "AI Matching Complete",
-      description: `Found ${mappedCandidates.length} matching candidates.`,
+      description: `Found ${found} matching candidates.`,
     });
   } catch (err: any) {
     toast({